@@ -0,0 +1,157 @@
+# backend/analytics.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, insert, select, text
+
+import models
+
+# --- INVENTORY ANALYTICS ---
+# Dashboards read small summary tables instead of aggregating sweets or the
+# purchase log. The write endpoints apply their deltas here in the same
+# transaction as the change itself, so the summaries can never disagree with
+# the inventory they describe.
+category_stats = models.CategoryStats.__table__
+purchase_events = models.PurchaseEvent.__table__
+purchase_stats_hourly = models.PurchaseStatsHourly.__table__
+sweets = models.Sweet.__table__
+
+# Time windows for purchase stats. Stats are kept per clock hour, so a window
+# covers the current, partial hour plus that many whole hours before it: "1h"
+# at 10:00:05 still counts the sales from 09:00 on. Windows never cover less
+# than their nominal length, and at most one hour more.
+WINDOWS = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+
+
+_upserts = {}
+
+
+def _upsert(table, keys, amounts):
+    # INSERT ... ON CONFLICT DO UPDATE adding `amounts` to the existing row,
+    # spelled the same by SQLite and PostgreSQL. Plain text built once per
+    # table: SQLAlchemy cannot cache the dialects' on_conflict_do_update, so
+    # it would compile the statement afresh on every purchase.
+    stmt = _upserts.get(table.name)
+    if stmt is None:
+        columns = keys + amounts
+        stmt = _upserts[table.name] = text(
+            f"INSERT INTO {table.name} ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)}) "
+            f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+            + ", ".join(f"{c} = {table.name}.{c} + excluded.{c}" for c in amounts)
+        ).bindparams(*(bindparam(c, type_=table.c[c].type) for c in columns))
+    return stmt
+
+
+async def _increment(db, table, keys, amounts, rows):
+    # Adds each row's `amounts` to the stored row with the same `keys`
+    # columns, creating it if needed; one executemany for all of them. Rows
+    # go in key order, so concurrent transactions lock summary rows in the
+    # same order and cannot deadlock each other.
+    if rows:
+        rows = sorted(rows, key=lambda row: tuple(row[key] for key in keys))
+        await db.execute(_upsert(table, keys, amounts), rows)
+
+
+async def apply_category_deltas(db, deltas):
+    # deltas: {category: (sweets, units, stock_value)}
+    await _increment(db, category_stats, ["category"], ["sweets", "units", "stock_value"], [
+        {"category": category, "sweets": count, "units": units, "stock_value": value}
+        for category, (count, units, value) in deltas.items()
+        if count or units or value
+    ])
+
+
+def stock_delta(deltas, category, price, quantity, sign):
+    # Adds (sign=1) or removes (sign=-1) one sweet's stock in `deltas`
+    count, units, value = deltas.get(category, (0, 0, 0.0))
+    deltas[category] = (count + sign, units + sign * quantity, value + sign * price * quantity)
+    return deltas
+
+
+async def record_purchases(db, purchases, at=None):
+    # purchases: [(sweet_id, quantity, unit_price, category)] for one request.
+    # Three statements however many lines: the event log insert, then the
+    # hourly and category upserts with the lines merged per key.
+    if not purchases:
+        return
+    at = at or datetime.utcnow()
+    hour = at.replace(minute=0, second=0, microsecond=0)
+    await db.execute(insert(purchase_events), [
+        {"sweet_id": sweet_id, "quantity": quantity, "unit_price": unit_price, "purchased_at": at}
+        for sweet_id, quantity, unit_price, _ in purchases
+    ])
+    hourly, sold = {}, {}
+    for sweet_id, quantity, unit_price, category in purchases:
+        count, units, revenue = hourly.get(sweet_id, (0, 0, 0.0))
+        hourly[sweet_id] = (count + 1, units + quantity, revenue + unit_price * quantity)
+        units, value = sold.get(category, (0, 0.0))
+        sold[category] = (units + quantity, value + unit_price * quantity)
+    await _increment(db, purchase_stats_hourly, ["sweet_id", "hour"], ["purchases", "units", "revenue"], [
+        {"sweet_id": sweet_id, "hour": hour, "purchases": count, "units": units, "revenue": revenue}
+        for sweet_id, (count, units, revenue) in hourly.items()
+    ])
+    await apply_category_deltas(db, {category: (0, -units, -value) for category, (units, value) in sold.items()})
+
+
+# --- QUERIES ---
+async def inventory_summary(db):
+    rows = (await db.execute(
+        select(category_stats).where(category_stats.c.sweets > 0).order_by(category_stats.c.category)
+    )).mappings().all()
+    categories = [
+        {"category": row["category"], "sweets": row["sweets"], "units": row["units"],
+         "stock_value": round(row["stock_value"], 2)}
+        for row in rows
+    ]
+    return {
+        "categories": categories,
+        "total": {
+            "sweets": sum(c["sweets"] for c in categories),
+            "units": sum(c["units"] for c in categories),
+            "stock_value": round(sum(row["stock_value"] for row in rows), 2),
+        },
+    }
+
+
+async def low_stock(db, threshold, limit):
+    # A range scan on ix_sweets_quantity_id; thresholds are arbitrary, so
+    # there is nothing to precompute
+    return (await db.scalars(
+        select(models.Sweet)
+        .where(models.Sweet.quantity <= threshold)
+        .order_by(models.Sweet.quantity, models.Sweet.id)
+        .limit(limit)
+    )).all()
+
+
+async def purchase_stats(db, window, limit, sweet_id=None, now=None):
+    now = now or datetime.utcnow()
+    since = now.replace(minute=0, second=0, microsecond=0) - WINDOWS[window]
+    units = func.sum(purchase_stats_hourly.c.units)
+    stmt = (
+        select(
+            purchase_stats_hourly.c.sweet_id,
+            sweets.c.name,
+            func.sum(purchase_stats_hourly.c.purchases).label("purchases"),
+            units.label("units"),
+            func.sum(purchase_stats_hourly.c.revenue).label("revenue"),
+        )
+        # Outer join: a deleted sweet's sales still count
+        .select_from(purchase_stats_hourly.outerjoin(sweets, sweets.c.id == purchase_stats_hourly.c.sweet_id))
+        .where(purchase_stats_hourly.c.hour >= since)
+        .group_by(purchase_stats_hourly.c.sweet_id, sweets.c.name)
+        .order_by(units.desc(), purchase_stats_hourly.c.sweet_id)
+        .limit(limit)
+    )
+    if sweet_id is not None:
+        stmt = stmt.where(purchase_stats_hourly.c.sweet_id == sweet_id)
+    rows = (await db.execute(stmt)).mappings().all()
+    return {
+        "window": window,
+        "since": since.isoformat(),
+        "sweets": [{**row, "revenue": round(row["revenue"], 2)} for row in rows],
+    }
@@ -0,0 +1,359 @@
+# backend/benchmarks/bench_api.py
+#
+# Mixed-workload benchmark for the whole API: catalog listing, search,
+# purchases and logins from concurrent in-process clients (httpx's ASGI
+# transport, no server or other services needed). Each scale seeds its own
+# throwaway SQLite database in a fresh process, so runs are isolated and
+# repeatable for a given --seed. Results are JSON with throughput and
+# p50/p95/p99 latency per operation, each the median over --repeat runs.
+#
+#   python benchmarks/bench_api.py                                # 1k sweets, 10k users
+#   python benchmarks/bench_api.py --sweets 1000 100000 1000000 --output run.json
+#   python benchmarks/bench_api.py --baseline benchmarks/baseline.json   # exit 1 on regression
+#   python benchmarks/bench_api.py --save-baseline benchmarks/baseline.json
+#
+# Baselines are only comparable on the same machine and settings; regenerate
+# one on the CI runner rather than reusing another machine's numbers. The
+# gate compares p50 latency and throughput: tail latencies of a single run
+# swing by more than any useful tolerance.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.join(BACKEND_DIR, "benchmarks")
+
+PASSWORD = "bench-password"
+DEFAULT_MIX = "list=50,search=25,purchase=20,login=5"
+OPERATIONS = ("list", "search", "purchase", "login")
+# Deliberately below the production cost: login would otherwise be nothing
+# but bcrypt, hiding everything else in the mix
+DEFAULT_BCRYPT_ROUNDS = 4
+SEARCH_TERMS = ["chocolate", "caramel", "mint", "zephyr", "hazel", "gumm", "carmel", "toffe", "dark bar", "sour che"]
+# Allowed relative slowdown before the gate fails, per operation. Logins wait
+# on the hashing pool's processes, which the OS schedules less evenly.
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_OPERATION_TOLERANCES = "login=0.5"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+# Latency and throughput cover successful responses only: a failure that
+# comes back fast would otherwise look like a speed-up
+def summarize(latencies, errors, elapsed):
+    if not latencies:
+        return {"requests": errors, "errors": errors, "throughput": 0.0, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def parse_tolerances(text):
+    tolerances = {}
+    for part in filter(None, text.split(",")):
+        name, _, value = part.partition("=")
+        if name not in OPERATIONS + ("all",):
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}; choose from {', '.join(OPERATIONS)}, all")
+        tolerances[name] = float(value)
+    return tolerances
+
+
+def merge_runs(runs):
+    # One result per scale: the median of every statistic over the repeated
+    # runs, except errors, where the worst run counts
+    def median(values):
+        return None if None in values else round(statistics.median(values), 2)
+
+    merged = dict(runs[0], runs=len(runs))
+    for key in ("elapsed_s", "seed_s"):
+        merged[key] = median([run[key] for run in runs])
+    merged["operations"] = {
+        operation: {
+            key: max(run["operations"][operation][key] for run in runs) if key == "errors"
+            else median([run["operations"][operation][key] for run in runs])
+            for key in stats
+        }
+        for operation, stats in runs[0]["operations"].items()
+    }
+    return merged
+
+
+# --- SEEDING ---
+def seed_database(url, sweets, users):
+    from sqlalchemy import create_engine
+
+    import bench_search
+    from security import hash_password
+
+    engine = create_engine(url)
+    try:
+        bench_search.seed(engine, sweets)
+        # One hash for everyone: hashing 10k passwords would dominate setup
+        hashed = hash_password(PASSWORD)
+        with engine.begin() as conn:
+            raw = conn.connection.driver_connection
+            raw.executemany(
+                "INSERT INTO users (username, hashed_password) VALUES (?, ?)",
+                ((f"user{i}", hashed) for i in range(users)),
+            )
+            # Plenty of stock, so every purchase exercises the success path
+            raw.execute("UPDATE sweets SET quantity = 1000000000")
+    finally:
+        engine.dispose()
+
+
+# --- WORKLOAD ---
+def plan_requests(rng, mix, total, sweets, users):
+    import bench_search
+
+    operations = rng.choices(list(mix), weights=list(mix.values()), k=total)
+    plan = []
+    for operation in operations:
+        if operation == "list":
+            params = rng.choice([
+                {},
+                {"category": rng.choice(bench_search.CATEGORIES)},
+                {"min_price": rng.randint(1, 10), "max_price": rng.randint(10, 20), "sort": "price"},
+            ])
+            plan.append((operation, params))
+        elif operation == "search":
+            plan.append((operation, {"name": rng.choice(SEARCH_TERMS)}))
+        elif operation == "purchase":
+            plan.append((operation, rng.randint(1, sweets)))
+        else:
+            plan.append((operation, f"user{rng.randrange(users)}"))
+    return plan
+
+
+async def send(client, headers, operation, arg):
+    if operation == "list":
+        return await client.get("/api/sweets", params=arg)
+    if operation == "search":
+        return await client.get("/api/sweets/search", params=arg)
+    if operation == "purchase":
+        return await client.post(f"/api/sweets/{arg}/purchase", headers=headers)
+    return await client.post("/api/auth/login", json={"username": arg, "password": PASSWORD})
+
+
+async def drive(client, headers, clients, plan):
+    latencies = {operation: [] for operation in OPERATIONS}
+    errors = {operation: 0 for operation in OPERATIONS}
+    pending = iter(plan)
+
+    async def worker():
+        for operation, arg in pending:
+            start = time.perf_counter()
+            response = await send(client, headers, operation, arg)
+            if response.status_code >= 400:
+                errors[operation] += 1
+            else:
+                latencies[operation].append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_workload(app, args):
+    import httpx
+
+    rng = random.Random(args.seed)
+    # The ASGI transport skips lifespan events, so drive them by hand
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/api/auth/login", json={"username": "user0", "password": PASSWORD})
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            # Unmeasured pass so pools, caches and SQLite's page cache are warm
+            warmup = plan_requests(rng, args.mix, max(args.clients * 2, 100), args.sweets_count, args.users)
+            await drive(client, headers, args.clients, warmup)
+
+            plan = plan_requests(rng, args.mix, args.requests, args.sweets_count, args.users)
+            latencies, errors, elapsed = await drive(client, headers, args.clients, plan)
+
+    operations = {op: summarize(latencies[op], errors[op], elapsed) for op in OPERATIONS if op in args.mix}
+    operations["all"] = summarize(
+        [sample for samples in latencies.values() for sample in samples], sum(errors.values()), elapsed
+    )
+    return {
+        "sweets": args.sweets_count,
+        "users": args.users,
+        "clients": args.clients,
+        "elapsed_s": round(elapsed, 2),
+        "operations": operations,
+    }
+
+
+def run_scale(args):
+    # Child process: configure the app for a private database, seed it, then
+    # import the app (its engines read the environment at import time)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["DATABASE_URL"] = url
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+        os.environ.setdefault("DB_POOL_SIZE", "20")
+        sys.path[:0] = [BACKEND_DIR, BENCHMARKS_DIR]
+        os.chdir(BACKEND_DIR)
+
+        seed_start = time.perf_counter()
+        seed_database(url, args.sweets_count, args.users)
+        seed_s = time.perf_counter() - seed_start
+
+        from main import app
+
+        result = asyncio.run(run_workload(app, args))
+        result["seed_s"] = round(seed_s, 2)
+        json.dump(result, sys.stdout)
+
+
+# --- REPORTING ---
+def compare(report, baseline, tolerance, operation_tolerances=None):
+    # Flags any operation with more errors than the baseline run at the same
+    # scale, or whose p50 rose, or throughput fell, by more than its tolerance
+    reference = {
+        (result["sweets"], operation): stats
+        for result in baseline["results"]
+        for operation, stats in result["operations"].items()
+    }
+    regressions = []
+    for result in report["results"]:
+        for operation, stats in result["operations"].items():
+            ref = reference.get((result["sweets"], operation))
+            if not ref:
+                continue
+            label = f"{operation} @ {result['sweets']} sweets"
+            if stats["errors"] > ref["errors"]:
+                regressions.append(f"{label}: errors {ref['errors']} -> {stats['errors']}")
+            if stats["p50_ms"] is None or ref["p50_ms"] is None:
+                continue
+            allowed = (operation_tolerances or {}).get(operation, tolerance)
+            if stats["p50_ms"] > ref["p50_ms"] * (1 + allowed):
+                regressions.append(f"{label}: p50 {ref['p50_ms']} -> {stats['p50_ms']} ms")
+            if stats["throughput"] < ref["throughput"] * (1 - allowed):
+                regressions.append(f"{label}: throughput {ref['throughput']} -> {stats['throughput']} req/s")
+    return regressions
+
+
+def print_table(report, out):
+    print(f"{'sweets':>9} {'operation':>10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}", file=out)
+    for result in report["results"]:
+        for operation, stats in result["operations"].items():
+            if not stats["requests"]:
+                continue
+            print(
+                f"{result['sweets']:>9} {operation:>10} {stats['throughput']:>8.0f} {stats['p50_ms']:>8.1f} "
+                f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['errors']:>7}",
+                file=out,
+            )
+
+
+def child_command(args, sweets):
+    return [
+        sys.executable, os.path.abspath(__file__),
+        "--run-scale", str(sweets),
+        "--users", str(args.users),
+        "--clients", str(args.clients),
+        "--requests", str(args.requests),
+        "--mix", ",".join(f"{op}={weight:g}" for op, weight in args.mix.items()),
+        "--seed", str(args.seed),
+        "--bcrypt-rounds", str(args.bcrypt_rounds),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-workload API benchmark")
+    parser.add_argument("--sweets", type=int, nargs="+", default=[1000], help="catalog sizes to run")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=5000, help="measured requests per scale")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"weights, e.g. {DEFAULT_MIX}")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--bcrypt-rounds", type=int, default=DEFAULT_BCRYPT_ROUNDS)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="compare against this report; exit 1 on regression")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scale; the report keeps their medians")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed relative slowdown")
+    parser.add_argument(
+        "--operation-tolerances", type=parse_tolerances, default=parse_tolerances(DEFAULT_OPERATION_TOLERANCES),
+        help=f"per-operation overrides, e.g. {DEFAULT_OPERATION_TOLERANCES}",
+    )
+    parser.add_argument("--save-baseline", help="also write the report here as the new baseline")
+    parser.add_argument("--run-scale", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scale is not None:
+        args.sweets_count = args.run_scale
+        run_scale(args)
+        return
+
+    report = {
+        "config": {
+            "users": args.users,
+            "clients": args.clients,
+            "requests": args.requests,
+            "mix": args.mix,
+            "seed": args.seed,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": [],
+    }
+    for sweets in args.sweets:
+        runs = []
+        for _ in range(args.repeat):
+            child = subprocess.run(child_command(args, sweets), stdout=subprocess.PIPE, check=True)
+            runs.append(json.loads(child.stdout))
+        report["results"].append(merge_runs(runs))
+
+    print_table(report, sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.operation_tolerances)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_load.py
+#
+# Concurrent-client load test for GET /api/sweets and POST /api/sweets/{id}/purchase.
+# The app runs in-process behind httpx's ASGI transport, so sync endpoints
+# still go through Starlette's threadpool exactly as under uvicorn. The
+# database is a throwaway SQLite file.
+#
+#   python benchmarks/bench_load.py                       # 50, 200, 1000 clients
+#   python benchmarks/bench_load.py --clients 50 --requests 2000
+#
+# --backend-dir points at another checkout's backend/ to compare revisions.
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+SWEETS = 1000
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def drive(client, clients, total, make_request):
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for i in remaining:
+            start = time.perf_counter()
+            response = await make_request(client, i)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{response.status_code}: {response.text}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, percentile(latencies, 50), percentile(latencies, 99)
+
+
+async def run(app, clients_levels, total):
+    # The ASGI transport skips lifespan events, so drive them by hand
+    async with app.router.lifespan_context(app):
+        await measure(app, clients_levels, total)
+
+
+async def measure(app, clients_levels, total):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"username": "bench", "password": "bench-password"}
+        await client.post("/api/auth/register", json=credentials)
+        token = (await client.post("/api/auth/login", json=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        ids = []
+        for i in range(SWEETS):
+            response = await client.post(
+                "/api/sweets",
+                json={"name": f"Bench {i}", "category": "Bench", "price": 1.0, "quantity": 10**9},
+                headers=headers,
+            )
+            ids.append(response.json()["id"])
+
+        async def list_sweets(client, i):
+            return await client.get("/api/sweets")
+
+        async def purchase(client, i):
+            return await client.post(f"/api/sweets/{ids[i % len(ids)]}/purchase", headers=headers)
+
+        print(f"{'endpoint':>16} {'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for clients in clients_levels:
+            for label, make_request in [("get_sweets", list_sweets), ("purchase_sweet", purchase)]:
+                # Unmeasured pass so pools and caches are warm at this concurrency
+                await drive(client, clients, clients * 2, make_request)
+                rps, p50, p99 = await drive(client, clients, max(total, clients), make_request)
+                print(f"{label:>16} {clients:>8} {rps:>8.0f} {p50:>8.1f} {p99:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--requests", type=int, default=3000, help="requests per endpoint and level")
+    parser.add_argument("--backend-dir", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the app (and its engine) is imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ.setdefault("BCRYPT_ROUNDS", "4")
+        os.environ.setdefault("DB_POOL_SIZE", "20")
+        sys.path.insert(0, os.path.abspath(args.backend_dir))
+        os.chdir(args.backend_dir)
+        from main import app
+
+        asyncio.run(run(app, args.clients, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# backend/benchmarks/bench_purchase.py
+#
+# Purchase path under concurrency: the old read-modify-write (SELECT, check,
+# quantity -= 1, commit, refresh) against the single conditional UPDATE used
+# by purchase_sweet, plus a 20-line cart as 20 purchases vs one /api/orders
+# transaction. Runs against a throwaway SQLite file.
+#
+#   python benchmarks/bench_purchase.py --threads 8 --stock 2000
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import migrations
+import models
+
+
+# The conditional UPDATE from main.take_stock, run on a sync session: main's
+# version is async, and its callers' purchase logging is not what this compares
+def take_stock(db, sweet_id, amount):
+    stmt = (
+        update(models.Sweet)
+        .where(models.Sweet.id == sweet_id, models.Sweet.quantity >= amount)
+        .values(quantity=models.Sweet.quantity - amount)
+        .returning(models.Sweet.quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(stmt).scalar()
+
+
+def read_modify_write(db, sweet_id):
+    sweet = db.query(models.Sweet).filter(models.Sweet.id == sweet_id).first()
+    if sweet.quantity <= 0:
+        return False
+    sweet.quantity -= 1
+    db.commit()
+    db.refresh(sweet)
+    return True
+
+
+def conditional_update(db, sweet_id):
+    ok = take_stock(db, sweet_id, 1) is not None
+    db.commit() if ok else db.rollback()
+    return ok
+
+
+def hammer(Session, sweet_id, attempts, threads, buy):
+    def worker(n):
+        sold = errors = 0
+        db = Session()
+        try:
+            for _ in range(n):
+                try:
+                    sold += buy(db, sweet_id)
+                except OperationalError:
+                    # "database is locked": the request would have failed
+                    db.rollback()
+                    errors += 1
+        finally:
+            db.close()
+        return sold, errors
+
+    per_thread = attempts // threads
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(worker, [per_thread] * threads))
+    elapsed = time.perf_counter() - start
+    return sum(r[0] for r in results), sum(r[1] for r in results), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--stock", type=int, default=2000)
+    args = parser.parse_args()
+    attempts = args.stock * 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"check_same_thread": False}
+        )
+        migrations.upgrade(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        print(f"{'path':>20} {'sold':>6} {'stock':>6} {'oversold':>9} {'errors':>7} {'attempts/s':>11}")
+        for label, buy in [("read-modify-write", read_modify_write), ("conditional update", conditional_update)]:
+            with Session() as db:
+                sweet = models.Sweet(name=label, category="Bench", price=1.0, quantity=args.stock)
+                db.add(sweet)
+                db.commit()
+                sweet_id = sweet.id
+            sold, errors, elapsed = hammer(Session, sweet_id, attempts, args.threads, buy)
+            print(f"{label:>20} {sold:>6} {args.stock:>6} {max(sold - args.stock, 0):>9} {errors:>7} {attempts / elapsed:>11.0f}")
+
+        # One 20-line cart: 20 purchase transactions vs one order transaction
+        with Session() as db:
+            sweets = [models.Sweet(name=f"Cart {i}", category="Bench", price=1.0, quantity=10**6) for i in range(20)]
+            db.add_all(sweets)
+            db.commit()
+            ids = [s.id for s in sweets]
+        carts = 200
+        with Session() as db:
+            start = time.perf_counter()
+            for _ in range(carts):
+                for sweet_id in ids:
+                    conditional_update(db, sweet_id)
+            per_item = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(carts):
+                for sweet_id in ids:
+                    take_stock(db, sweet_id, 1)
+                db.commit()
+            per_order = time.perf_counter() - start
+        print(f"20-item cart: {carts / per_item:.0f} carts/s as single purchases, {carts / per_order:.0f} carts/s as one order")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# backend/benchmarks/bench_search.py
+#
+# Compares /api/sweets/search's FTS5 path against the old LIKE '%x%' scan.
+# Each scale gets its own throwaway SQLite file; nothing touches sweets_v3.db.
+#
+#   python benchmarks/bench_search.py                 # 10k, 100k, 1M rows
+#   python benchmarks/bench_search.py --scales 10000 --repeat 50
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import migrations
+import models
+import search
+
+ADJECTIVES = ["Dark", "Milk", "White", "Sour", "Sweet", "Salted", "Crunchy", "Chewy", "Fizzy", "Spicy"]
+FLAVOURS = ["Chocolate", "Caramel", "Toffee", "Mint", "Cherry", "Lemon", "Mango", "Hazelnut", "Vanilla", "Liquorice"]
+KINDS = ["Bar", "Drops", "Bites", "Truffle", "Lollipop", "Gummies", "Fudge", "Brittle", "Nougat", "Marshmallow"]
+CATEGORIES = ["Chocolate", "Candy", "Gummy", "Hard Candy", "Baked", "Seasonal"]
+
+# (label, query): a common word, a rare word, a prefix and a typo
+QUERIES = [
+    ("common", "chocolate"),
+    ("rare", "zephyr"),
+    ("prefix", "hazel"),
+    ("typo", "carmel"),
+]
+PAGE_SIZE = 50
+
+
+def seed(engine, rows: int):
+    migrations.upgrade(engine)
+    rng = random.Random(rows)
+    batch = []
+    with engine.begin() as conn:
+        raw = conn.connection.driver_connection
+        for i in range(rows):
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(FLAVOURS)} {rng.choice(KINDS)}"
+            if i % 10000 == 0:
+                name = f"Zephyr {name}"
+            batch.append((name, rng.choice(CATEGORIES), round(rng.uniform(0.5, 20), 2), rng.randint(0, 500)))
+            if len(batch) == 10000:
+                raw.executemany("INSERT INTO sweets (name, category, price, quantity) VALUES (?, ?, ?, ?)", batch)
+                batch.clear()
+        if batch:
+            raw.executemany("INSERT INTO sweets (name, category, price, quantity) VALUES (?, ?, ?, ?)", batch)
+
+
+def like_search(db, query):
+    return (
+        db.query(models.Sweet)
+        .filter(models.Sweet.name.contains(query))
+        .order_by(models.Sweet.id)
+        .limit(PAGE_SIZE)
+        .all()
+    )
+
+
+def fts_search(db, query):
+    return search.search_sweets(db, query, limit=PAGE_SIZE)
+
+
+def time_ms(fn, db, query, repeat):
+    fn(db, query)  # warm the page cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(db, query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'query':>8} {'like ms':>9} {'fts ms':>9} {'like hits':>10} {'fts hits':>9}")
+    for rows in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            seed(engine, rows)
+            db = sessionmaker(bind=engine)()
+            try:
+                for label, query in QUERIES:
+                    like_ms = time_ms(like_search, db, query, args.repeat)
+                    fts_ms = time_ms(fts_search, db, query, args.repeat)
+                    like_hits = len(like_search(db, query))
+                    fts_hits = len(fts_search(db, query))
+                    print(f"{rows:>9} {label:>8} {like_ms:>9.2f} {fts_ms:>9.2f} {like_hits:>10} {fts_hits:>9}")
+            finally:
+                db.close()
+                engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
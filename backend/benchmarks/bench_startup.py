@@ -0,0 +1,93 @@
+# backend/benchmarks/bench_startup.py
+#
+# Cold start: how long `import main` takes, whether the import already touches
+# the database or loads the crypto stack, and the latency of the first request
+# (which pays for lazy startup: migrations on a fresh database, search probe)
+# and of the one after it. Every sample is a fresh process with its own
+# throwaway SQLite file. Prints JSON; tests/test_startup.py runs it against
+# budgets.
+#
+#   python benchmarks/bench_startup.py --repeat 5
+#   python benchmarks/bench_startup.py --max-import-s 2 --max-first-request-s 2   # exit 1 if over
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once():
+    # Child process: DATABASE_URL is already set and the file must not exist
+    db_path = os.environ["DATABASE_URL"].removeprefix("sqlite:///")
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+
+    start = time.perf_counter()
+    import main
+    import_s = time.perf_counter() - start
+    sample = {
+        "import_s": import_s,
+        "db_touched_on_import": os.path.exists(db_path),
+        "crypto_loaded_on_import": "passlib" in sys.modules,
+    }
+
+    from fastapi.testclient import TestClient
+
+    client = TestClient(main.app)
+    for key in ("first_request_s", "second_request_s"):
+        start = time.perf_counter()
+        response = client.get("/api/sweets")
+        sample[key] = time.perf_counter() - start
+        assert response.status_code == 200, response.text
+    json.dump(sample, sys.stdout)
+
+
+def measure(repeat):
+    samples = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}")
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child"],
+                env=env, stdout=subprocess.PIPE, check=True,
+            )
+            samples.append(json.loads(child.stdout))
+    report = {key: round(statistics.median(s[key] for s in samples), 4) for key in samples[0] if key.endswith("_s")}
+    report["db_touched_on_import"] = any(s["db_touched_on_import"] for s in samples)
+    report["crypto_loaded_on_import"] = any(s["crypto_loaded_on_import"] for s in samples)
+    report["samples"] = len(samples)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import and first-request latency")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes to take the median over")
+    parser.add_argument("--max-import-s", type=float)
+    parser.add_argument("--max-first-request-s", type=float)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_once()
+        return
+
+    report = measure(args.repeat)
+    print(json.dumps(report, indent=2))
+    over = []
+    if args.max_import_s is not None and report["import_s"] > args.max_import_s:
+        over.append(f"import took {report['import_s']:.3f}s (budget {args.max_import_s}s)")
+    if args.max_first_request_s is not None and report["first_request_s"] > args.max_first_request_s:
+        over.append(f"first request took {report['first_request_s']:.3f}s (budget {args.max_first_request_s}s)")
+    for message in over:
+        print(f"OVER BUDGET {message}", file=sys.stderr)
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# backend/bulk.py
+import codecs
+import csv
+import io
+import json
+
+from sqlalchemy import bindparam, insert, select, tuple_, update
+
+import analytics
+import models
+
+# Bulk inventory import/export. Uploads are parsed as they stream in and
+# written in batches: one lookup, one executemany INSERT and one executemany
+# UPDATE per batch, keyed on (name, category). Exports stream straight from a
+# server-side cursor, so memory stays flat whatever the table size.
+FIELDS = ("name", "category", "price", "quantity")
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+sweets = models.Sweet.__table__
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+# Longest line accepted. A longer one is reported and skipped up to its
+# newline rather than buffered.
+MAX_LINE_CHARS = 64 * 1024
+
+
+async def iter_lines(chunks):
+    # Yields (line_no, line, error); error is set, and line None, for a line
+    # over MAX_LINE_CHARS. Only the newly decoded text is searched for
+    # newlines, so work stays linear however the body is chunked.
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    parts, size, overlong = [], 0, False
+    line_no = 0
+    async for chunk in chunks:
+        *ends, rest = decoder.decode(chunk).split("\n")
+        for end in ends:
+            line_no += 1
+            if overlong or size + len(end) > MAX_LINE_CHARS:
+                yield line_no, None, f"Line is longer than {MAX_LINE_CHARS} characters"
+            else:
+                yield line_no, ("".join(parts) + end).rstrip("\r"), None
+            parts, size, overlong = [], 0, False
+        if not overlong:
+            parts.append(rest)
+            size += len(rest)
+            if size > MAX_LINE_CHARS:
+                parts, size, overlong = [], 0, True
+    rest = decoder.decode(b"", final=True)
+    if overlong or size + len(rest) > MAX_LINE_CHARS:
+        yield line_no + 1, None, f"Line is longer than {MAX_LINE_CHARS} characters"
+    elif size or rest:
+        yield line_no + 1, ("".join(parts) + rest).rstrip("\r"), None
+
+
+async def iter_ndjson(chunks):
+    async for line_no, line, error in iter_lines(chunks):
+        if error is not None:
+            yield line_no, None, error
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield line_no, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Expected a JSON object"
+            continue
+        yield line_no, record, None
+
+
+# A quoted field may span lines, but a record still open after this many
+# lines or characters is reported as malformed rather than buffered further
+CSV_MAX_RECORD_LINES = 100
+CSV_MAX_RECORD_CHARS = 64 * 1024
+
+
+def _ends_quoted(line, quoted):
+    # Whether `line` ends inside a quoted field, given whether it starts in
+    # one. Mirrors the csv module's default dialect: a quote opens a field
+    # only at the field's start (5" Lolly is a plain value) and a doubled
+    # quote inside one is literal.
+    at_start = not quoted
+    closing = False
+    for char in line:
+        if quoted:
+            if closing and char == '"':
+                closing = False
+                continue
+            if not closing:
+                closing = char == '"'
+                continue
+            quoted = closing = False
+        if char == ",":
+            at_start = True
+        elif at_start and char == '"':
+            quoted, at_start = True, False
+        else:
+            at_start = False
+    return quoted and not closing
+
+
+async def iter_csv(chunks):
+    header = None
+    pending, pending_chars, first_line, quoted = [], 0, None, False
+    async for line_no, line, error in iter_lines(chunks):
+        if error is not None:
+            if header is None:
+                raise ImportFormatError(f"CSV header: {error}")
+            # Drops any record the line belonged to
+            yield first_line or line_no, None, error
+            pending, pending_chars, first_line, quoted = [], 0, None, False
+            continue
+        pending.append(line)
+        pending_chars += len(line)
+        first_line = first_line or line_no
+        quoted = _ends_quoted(line, quoted)
+        if quoted:
+            if len(pending) < CSV_MAX_RECORD_LINES and pending_chars < CSV_MAX_RECORD_CHARS:
+                continue
+            yield first_line, None, "Quoted field is too long or never closed"
+            pending, pending_chars, first_line, quoted = [], 0, None, False
+            continue
+        record_line, lines = first_line, pending
+        pending, pending_chars, first_line = [], 0, None
+        if not any(part.strip() for part in lines):
+            continue
+        values = next(csv.reader(part + "\n" for part in lines))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            missing = [field for field in FIELDS if field not in header]
+            if missing:
+                raise ImportFormatError(f"CSV header is missing: {', '.join(missing)}")
+            continue
+        if len(values) != len(header):
+            yield record_line, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield record_line, dict(zip(header, values)), None
+    if pending:
+        yield first_line, None, "Unterminated quoted field"
+
+
+async def upsert_batch(db, rows):
+    # rows: {(name, category): values}. Rows already in the table are updated
+    # in place (all of them, should a key be duplicated); the rest are inserted.
+    # Locked (in id order, like orders) until commit: the stats deltas are
+    # computed from these values, so concurrent purchases must wait
+    current = (await db.execute(
+        select(sweets.c.name, sweets.c.category, sweets.c.price, sweets.c.quantity)
+        .where(tuple_(sweets.c.name, sweets.c.category).in_(list(rows)))
+        .order_by(sweets.c.id)
+        .with_for_update()
+    )).all()
+    existing = {(row.name, row.category) for row in current}
+    inserts = [values for key, values in rows.items() if key not in existing]
+
+    # Category summaries: each overwritten row's old stock out, new stock in
+    deltas = {}
+    for row in current:
+        analytics.stock_delta(deltas, row.category, row.price or 0, row.quantity or 0, -1)
+        new = rows[(row.name, row.category)]
+        analytics.stock_delta(deltas, new["category"], new["price"], new["quantity"], 1)
+    for values in inserts:
+        analytics.stock_delta(deltas, values["category"], values["price"], values["quantity"], 1)
+    await analytics.apply_category_deltas(db, deltas)
+
+    updates = [
+        {"b_name": values["name"], "b_category": values["category"],
+         "b_price": values["price"], "b_quantity": values["quantity"]}
+        for key, values in rows.items() if key in existing
+    ]
+    if inserts:
+        await db.execute(insert(sweets), inserts)
+    if updates:
+        await db.execute(
+            update(sweets)
+            .where(sweets.c.name == bindparam("b_name"), sweets.c.category == bindparam("b_category"))
+            .values(price=bindparam("b_price"), quantity=bindparam("b_quantity")),
+            updates,
+        )
+    await db.commit()
+    return len(inserts), len(updates)
+
+
+def _describe(exc):
+    # pydantic's ValidationError lists every bad field; anything else is one message
+    if not hasattr(exc, "errors"):
+        return str(exc)
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in exc.errors())
+
+
+async def import_sweets(db, records, validate, batch_size, max_errors):
+    summary = {"inserted": 0, "updated": 0, "failed": 0, "errors": []}
+    batch = {}
+
+    async def flush():
+        inserted, updated = await upsert_batch(db, batch)
+        summary["inserted"] += inserted
+        summary["updated"] += updated
+        batch.clear()
+
+    async for line_no, record, error in records:
+        if error is None:
+            try:
+                sweet = validate(record)
+            except ValueError as exc:
+                error = _describe(exc)
+        if error is not None:
+            summary["failed"] += 1
+            if len(summary["errors"]) < max_errors:
+                summary["errors"].append({"line": line_no, "error": error})
+            continue
+        # Later lines win when a key repeats within the batch
+        batch[(sweet.name, sweet.category)] = sweet.model_dump(include=set(FIELDS))
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    return summary
+
+
+def _encode(fmt, rows, header=False):
+    if fmt == "ndjson":
+        return "".join(json.dumps(dict(zip(("id",) + FIELDS, row))) + "\n" for row in rows)
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    if header:
+        writer.writerow(("id",) + FIELDS)
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+async def export_sweets(session_factory, fmt, batch_size):
+    # Opens its own session: the response body is produced after the
+    # endpoint (and its dependencies) have returned.
+    async with session_factory() as db:
+        result = await db.stream(
+            select(sweets.c.id, *(sweets.c[field] for field in FIELDS))
+            .order_by(sweets.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+        if fmt == "csv":
+            yield _encode(fmt, [], header=True)
+        async for rows in result.partitions():
+            yield _encode(fmt, rows)
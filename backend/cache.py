@@ -0,0 +1,140 @@
+# backend/cache.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- CATALOG CACHE ---
+# Read-through cache for the catalog endpoints. Entries are the finished JSON
+# body plus its ETag, keyed by path and query string, so a hit skips both the
+# database and Pydantic. Every write bumps the catalog version; keys include
+# the version, so older entries can never be served again and simply age out.
+#
+#   CATALOG_CACHE=memory          per-process (default)
+#   CATALOG_CACHE=redis://host/0  shared by every worker (needs the redis package)
+#   CATALOG_CACHE=off
+CATALOG_CACHE = os.getenv("CATALOG_CACHE", "memory")
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "30"))
+CATALOG_CACHE_MAX_BYTES = int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(etag, if_none_match):
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # If-None-Match uses weak comparison
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class MemoryCache:
+    # LRU bounded by total body size; entries also expire after `ttl` seconds.
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._version = 0
+        self._entries = OrderedDict()  # (version, key) -> (etag, body, expires_at)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    async def version(self):
+        return self._version
+
+    async def get(self, version, key):
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is None:
+                return None
+            etag, body, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove((version, key))
+                return None
+            self._entries.move_to_end((version, key))
+            return etag, body
+
+    async def set(self, version, key, etag, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            # Built before a write: it could never be served, only evict live pages
+            if version != self._version:
+                return
+            self._remove((version, key))
+            self._entries[(version, key)] = (etag, body, time.monotonic() + self.ttl)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    async def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, entry_key):
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+
+class RedisCache:
+    # Shared between workers: the version is a Redis counter, so a write in
+    # one worker invalidates every other worker's view at once. Redis does the
+    # TTL and, given a maxmemory policy, the LRU eviction.
+    VERSION_KEY = "catalog:version"
+
+    def __init__(self, url, ttl):
+        import redis.asyncio
+
+        self.ttl = ttl
+        self._redis = redis.asyncio.from_url(url)
+
+    async def version(self):
+        return int(await self._redis.get(self.VERSION_KEY) or 0)
+
+    async def get(self, version, key):
+        raw = await self._redis.get(f"catalog:{version}:{key}")
+        if raw is None:
+            return None
+        etag, _, body = raw.partition(b" ")
+        return etag.decode(), body
+
+    async def set(self, version, key, etag, body):
+        await self._redis.set(f"catalog:{version}:{key}", etag.encode() + b" " + body, ex=int(self.ttl) or None)
+
+    async def invalidate(self):
+        await self._redis.incr(self.VERSION_KEY)
+
+
+class NullCache:
+    async def version(self):
+        return 0
+
+    async def get(self, version, key):
+        return None
+
+    async def set(self, version, key, etag, body):
+        pass
+
+    async def invalidate(self):
+        pass
+
+
+def create_cache(spec=CATALOG_CACHE):
+    if spec in ("off", "none", ""):
+        return NullCache()
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(spec, CATALOG_CACHE_TTL)
+    if spec == "memory":
+        return MemoryCache(CATALOG_CACHE_MAX_BYTES, CATALOG_CACHE_TTL)
+    raise ValueError(f"Unknown CATALOG_CACHE: {spec!r}")
+
+
+catalog_cache = create_cache()
@@ -1,23 +1,127 @@
 # backend/database.py
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import metrics
+
+# --- CONFIG ---
+# Everything comes from the environment so the same code runs against the
+# local SQLite file and a PostgreSQL server, e.g.
+#   DATABASE_URL=postgresql://shop:secret@db/sweets
+# Requests run on the async driver for the same database (aiosqlite or
+# asyncpg); migrations and scripts use the plain sync driver.
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sweets_v3.db")
+# Optional replica for the catalog reads; defaults to the primary database
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", SQLALCHEMY_DATABASE_URL)
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+# SQLite only. WAL lets readers run alongside the single writer, and
+# busy_timeout makes writers wait for the lock instead of failing at once.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB, so 64 MiB
+
+# SQLite has a single writer. Giving the write engine one connection makes
+# concurrent writers queue on the pool instead of spinning in busy_timeout.
+SQLITE_WRITE_CONNECTIONS = int(os.getenv("SQLITE_WRITE_CONNECTIONS", "1"))
+
+# Apply pending migrations at startup. Multi-worker deployments should run
+# `python migrations.py` once before starting the workers and set this to 0.
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "1") == "1"
+
+
+def _set_sqlite_pragmas(read_only):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+    return on_connect
+
 
-# This creates a file named 'sweets.db' in your folder
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sweets_v3.db"
+# Sync driver name -> async driver for the request path
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
 
-# connect_args is needed only for SQLite
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _is_in_memory(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def create_db_engine(url, read_only=False, asynchronous=False):
+    url = make_url(url)
+    if asynchronous:
+        url = url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername))
+    sqlite = url.get_backend_name() == "sqlite"
+    kwargs = {"pool_recycle": POOL_RECYCLE}
+    if sqlite:
+        # connect_args is needed only for SQLite
+        kwargs["connect_args"] = {"check_same_thread": False}
+    else:
+        # A local file never drops the connection, so only servers get pinged
+        kwargs["pool_pre_ping"] = POOL_PRE_PING
+    if _is_in_memory(url):
+        # One shared connection, or every thread would see its own empty db
+        kwargs["poolclass"] = StaticPool
+    elif sqlite and not read_only and asynchronous:
+        kwargs.update(pool_size=SQLITE_WRITE_CONNECTIONS, max_overflow=0, pool_timeout=POOL_TIMEOUT)
+    else:
+        kwargs.update(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT)
+
+    if asynchronous:
+        db_engine = create_async_engine(url, **kwargs)
+        sync_engine = db_engine.sync_engine
+    else:
+        db_engine = sync_engine = create_engine(url, **kwargs)
+    if url.get_backend_name() == "sqlite":
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas(read_only))
+    if metrics.METRICS_ENABLED:
+        # Per-request query count and SQL time
+        metrics.instrument_engine(sync_engine)
+    return db_engine
+
+
+# Startup migrations and offline scripts
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
+
+# Request path
+async_engine = create_db_engine(SQLALCHEMY_DATABASE_URL, asynchronous=True)
+read_async_engine = create_db_engine(READ_DATABASE_URL, read_only=True, asynchronous=True)
+
+# expire_on_commit=False: attributes stay loaded after commit, so returning a
+# committed row never triggers a lazy (and, under asyncio, illegal) refresh.
+SessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+ReadSessionLocal = async_sessionmaker(read_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
 # Dependency to get the database session in endpoints
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
+
+# Same, for endpoints that only read (catalog listing and search)
+async def get_read_db():
+    async with ReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
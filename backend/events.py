@@ -0,0 +1,160 @@
+# backend/events.py
+import asyncio
+import json
+import os
+import secrets
+import threading
+from collections import deque
+
+# --- INVENTORY EVENTS ---
+# Catalog changes pushed to clients over Server-Sent Events. Each event is
+# encoded once and the same bytes are fanned out to every subscriber. A
+# subscriber that falls EVENT_QUEUE_SIZE events behind is cut off instead of
+# letting its backlog grow; it reconnects with Last-Event-ID and resumes from
+# the replay history, or gets a "reset" (refetch everything) once it has
+# fallen out of it. Events are per process: each worker streams its own writes,
+# and ids are "<boot>-<seq>" with a token drawn when the process starts, so an
+# id from another worker or from before a restart is recognised and reset.
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+EVENT_HISTORY_SIZE = int(os.getenv("EVENT_HISTORY_SIZE", "1024"))
+# Seconds between comment lines on an idle stream, so proxies keep it open
+EVENT_KEEPALIVE = float(os.getenv("EVENT_KEEPALIVE", "15"))
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+def encode_event(event_id, kind, data):
+    return f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class Subscriber:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.dropped = False
+        self._frames = deque()
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def push(self, frame):
+        if self.dropped:
+            return
+        if len(self._frames) >= self.maxsize:
+            self.dropped = True
+        else:
+            self._frames.append(frame)
+        self._wake()
+
+    def close(self):
+        self.dropped = True
+        self._wake()
+
+    def _wake(self):
+        # Publishers may run on another thread's loop (or none at all)
+        try:
+            if _running_loop() is self._loop:
+                self._ready.set()
+            else:
+                self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # The subscriber's loop is gone
+            self.dropped = True
+
+    async def stream(self, keepalive=EVENT_KEEPALIVE):
+        # Frames already queued are still delivered after a drop, so the
+        # client's Last-Event-ID is exactly where it should resume.
+        while True:
+            while self._frames:
+                yield self._frames.popleft()
+            if self.dropped:
+                return
+            self._ready.clear()
+            if self._frames or self.dropped:
+                continue
+            try:
+                await asyncio.wait_for(self._ready.wait(), keepalive)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE_FRAME
+
+
+class EventBroker:
+    def __init__(self, queue_size, history_size):
+        self.queue_size = queue_size
+        self.boot = secrets.token_hex(4)
+        self.last_seq = 0
+        self._history = deque(maxlen=history_size)  # (seq, frame)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    @property
+    def last_id(self):
+        return f"{self.boot}-{self.last_seq}"
+
+    def restart(self):
+        # A forked worker must not reuse its parent's ids or history
+        self._lock = threading.Lock()
+        self.boot = secrets.token_hex(4)
+        self.last_seq = 0
+        self._history.clear()
+        self._subscribers = set()
+
+    def publish(self, kind, data):
+        with self._lock:
+            self.last_seq += 1
+            event_id = self.last_id
+            frame = encode_event(event_id, kind, data)
+            self._history.append((self.last_seq, frame))
+            for subscriber in list(self._subscribers):
+                subscriber.push(frame)
+                if subscriber.dropped:
+                    self._subscribers.discard(subscriber)
+            return event_id
+
+    def subscribe(self, last_id=None):
+        # Must be called from the loop that will consume the stream
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            if last_id is not None:
+                # Replay may exceed the queue bound; it is capped by the history
+                subscriber._frames.extend(self._replay(last_id))
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def replay(self, last_id):
+        with self._lock:
+            return self._replay(last_id)
+
+    def close(self):
+        with self._lock:
+            for subscriber in self._subscribers:
+                subscriber.close()
+            self._subscribers.clear()
+
+    def _replay(self, last_id):
+        boot, _, seq = last_id.rpartition("-")
+        after = int(seq) if boot == self.boot and seq.isdigit() else None
+        oldest = self._history[0][0] if self._history else self.last_seq + 1
+        if after is None or not oldest - 1 <= after <= self.last_seq:
+            # The id is from another process or before a restart, or the
+            # events this client missed are no longer kept
+            return [encode_event(self.last_id, "reset", {})]
+        return [frame for seq, frame in self._history if seq > after]
+
+
+inventory_events = EventBroker(EVENT_QUEUE_SIZE, EVENT_HISTORY_SIZE)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=inventory_events.restart)
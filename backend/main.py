@@ -1,27 +1,68 @@
 # backend/main.py
+import asyncio
+import base64
+import json
+import threading
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Optional
-from fastapi import FastAPI, Depends, HTTPException, status
+from typing import List, Literal, Optional
+from urllib.parse import urlencode
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from pydantic import BaseModel, Field
+from sqlalchemy import event, inspect, select, text, tuple_, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 import jose
 
-from database import engine, get_db, Base
+from database import AUTO_MIGRATE, engine, async_engine, read_async_engine, get_db, get_read_db, ReadSessionLocal, Base
+import analytics
+import bulk
+from cache import catalog_cache, etag_matches, make_etag
+from events import EVENT_KEEPALIVE, inventory_events
+import metrics
+import migrations
 import models
+import search
+from security import CurrentUser, HashPoolBusy, check_password, hash_password, hash_pool, token_cache
 
-models.Base.metadata.create_all(bind=engine)
+# --- STARTUP ---
+# Importing this module touches no database. initialize() runs migrations and
+# probes for full-text search once per process: from the lifespan startup, or
+# from the first request when nothing ran the lifespan. serve.py calls it in
+# the parent before forking, so workers start ready.
+READY = False
+FULL_TEXT_SEARCH = False
+_startup_lock = threading.Lock()
 
-app = FastAPI()
+def initialize():
+    global READY, FULL_TEXT_SEARCH
+    with _startup_lock:
+        if READY:
+            return
+        if AUTO_MIGRATE:
+            migrations.upgrade(engine)
+        with engine.connect() as conn:
+            FULL_TEXT_SEARCH = search.search_index_exists(conn)
+        # Requests use the async engines; don't keep (or fork) this one's connections
+        engine.dispose()
+        READY = True
+
+async def ensure_ready():
+    if not READY:
+        await asyncio.to_thread(initialize)
+
+# API routes wait for initialize(); /ready and /metrics must answer regardless
+router = APIRouter(dependencies=[Depends(ensure_ready)])
+ops_router = APIRouter()
 
 # --- SECURITY ---
 SECRET_KEY = "supersecretkey" 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 # --- SCHEMAS (FIXED) ---
@@ -43,6 +84,19 @@ class SweetResponse(SweetBase):
     class Config:
         from_attributes = True
 
+# 4. One page of a keyset-paginated listing
+class SweetPage(BaseModel):
+    items: List[SweetResponse]
+    next_cursor: Optional[str] = None
+
+# 5. Checkout: many sweets, arbitrary quantities, one transaction
+class OrderItem(BaseModel):
+    sweet_id: int
+    quantity: int = Field(1, gt=0)
+
+class OrderCreate(BaseModel):
+    items: List[OrderItem] = Field(..., min_length=1)
+
 class UserSchema(BaseModel):
     username: str
     password: str
@@ -52,50 +106,219 @@ class LoginSchema(BaseModel):
     password: str
 
 # --- HELPERS ---
-def get_password_hash(password):
-    return pwd_context.hash(password)
+# bcrypt runs in the hashing process pool. When too many hashes are already in
+# flight the request is turned away instead of queueing behind them.
+async def run_hash(fn, *args):
+    try:
+        return await hash_pool.run(fn, *args)
+    except HashPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, try again", headers={"Retry-After": "1"})
+
+# Spans include any wait for a free hashing worker
+async def get_password_hash(password):
+    with metrics.span("get_password_hash"):
+        return await run_hash(hash_password, password)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    with metrics.span("verify_password"):
+        return await run_hash(check_password, plain_password, hashed_password)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with metrics.span("jwt_encode"):
+        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_user_by_username(db: AsyncSession, username: str):
+    return await db.scalar(select(models.User).where(models.User.username == username))
+
+# User lookups read through the read engine so they never hold the write
+# connection, which on SQLite is a single shared one.
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_read_db)):
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        with metrics.span("jwt_decode"):
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid credentials")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    user = db.query(models.User).filter(models.User.username == username).first()
+    user = await get_user_by_username(db, username)
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+    current_user = CurrentUser(id=user.id, username=user.username)
+    token_cache.put(token, current_user, payload["exp"])
+    return current_user
+
+# Any change to a user drops their cached tokens
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def invalidate_cached_tokens(mapper, connection, target):
+    renamed_from = inspect(target).attrs.username.history.deleted or ()
+    for username in (target.username, *renamed_from):
+        token_cache.invalidate_user(username)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_ready()
+    yield
+    hash_pool.shutdown()
+    # End open event streams so their connections can close
+    inventory_events.close()
+    # aiosqlite connections each own a worker thread; close them so the
+    # process can exit
+    await async_engine.dispose()
+    await read_async_engine.dispose()
+
+# Atomic stock decrement: a single conditional UPDATE, so two buyers can never
+# both take the last unit. Returns the sweet's remaining quantity, price and
+# category, or None when it is missing or has fewer than `amount` left.
+# Callers log successful takes with analytics.record_purchases. Does not commit.
+async def take_stock(db: AsyncSession, sweet_id: int, amount: int):
+    stmt = (
+        update(models.Sweet)
+        .where(models.Sweet.id == sweet_id, models.Sweet.quantity >= amount)
+        .values(quantity=models.Sweet.quantity - amount)
+        .returning(models.Sweet.quantity, models.Sweet.price, models.Sweet.category)
+        .execution_options(synchronize_session=False)
+    )
+    return (await db.execute(stmt)).first()
+
+# --- PAGINATION ---
+MAX_PAGE_SIZE = 200
+
+# --- BULK IMPORT / EXPORT ---
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_BATCH_SIZE = 10000
+# Per-row errors echoed back; the failed count still covers every bad row
+MAX_IMPORT_ERRORS = 100
+EXPORT_BATCH_SIZE = 1000
+
+SORT_COLUMNS = {
+    "id": models.Sweet.id,
+    "name": models.Sweet.name,
+    "price": models.Sweet.price,
+}
+
+# Cursors are opaque to clients: the sort value and id of the last row served.
+def encode_cursor(sort_value, sweet_id: int) -> str:
+    raw = json.dumps([sort_value, sweet_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+# Cursors come back from clients, so the sort value must have the type of the
+# column it is compared with: PostgreSQL rejects e.g. price > 'abc' outright.
+SORT_VALUE_TYPES = {"id": int, "name": str, "price": (int, float)}
+SCORE_TYPE = (int, float)
+
+def decode_cursor(cursor: str, sort_type):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, sweet_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(sort_value, bool) or not isinstance(sort_value, sort_type):
+            raise ValueError("sort value has the wrong type")
+        return sort_value, int(sweet_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def paginate(db: AsyncSession, stmt, sort: str, order: str, limit: int, cursor: Optional[str]):
+    sort_column = SORT_COLUMNS[sort]
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, SORT_VALUE_TYPES[sort])
+        if sort == "id":
+            key, last = models.Sweet.id, last_id
+        else:
+            key, last = tuple_(sort_column, models.Sweet.id), tuple_(sort_value, last_id)
+        stmt = stmt.where(key > last if order == "asc" else key < last)
+
+    if order == "asc":
+        stmt = stmt.order_by(sort_column.asc(), models.Sweet.id.asc())
+    else:
+        stmt = stmt.order_by(sort_column.desc(), models.Sweet.id.desc())
+
+    # Fetch one extra row to learn whether another page exists.
+    rows = (await db.scalars(stmt.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        next_cursor = encode_cursor(getattr(last_row, sort), last_row.id)
+    return {"items": rows, "next_cursor": next_cursor}
+
+# --- CATALOG CACHE ---
+# Listing and search responses are cached as finished JSON. The version is
+# read before the query runs, so a page built from pre-write data can only
+# ever be stored under the pre-write version. Clients revalidate with
+# If-None-Match and get a 304 while the page is unchanged.
+async def catalog_response(request: Request, build) -> Response:
+    # Re-encoded, so a value containing "&" or "=" cannot pose as other parameters
+    key = request.url.path + "?" + urlencode(sorted(request.query_params.multi_items()))
+    version = await catalog_cache.version()
+    cached = await catalog_cache.get(version, key)
+    if cached is None:
+        body = SweetPage.model_validate(await build(), from_attributes=True).model_dump_json().encode()
+        etag = make_etag(body)
+        await catalog_cache.set(version, key, etag, body)
+    else:
+        etag, body = cached
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(etag, request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+# Every committed catalog write lands here: cached pages are dropped and the
+# change is pushed to event stream subscribers.
+async def catalog_changed(*changes):
+    await catalog_cache.invalidate()
+    for kind, data in changes:
+        inventory_events.publish(kind, data)
+
+def sweet_event(sweet):
+    return SweetResponse.model_validate(sweet).model_dump()
 
 # --- ENDPOINTS ---
 
-@app.post("/api/auth/register", status_code=201)
-def register(user: UserSchema, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+# Readiness probe: 200 once startup has finished and the database answers
+@ops_router.get("/ready", include_in_schema=False)
+async def readiness(db: AsyncSession = Depends(get_read_db)):
+    if not READY:
+        raise HTTPException(status_code=503, detail="Starting up")
+    try:
+        await db.execute(text("SELECT 1"))
+    except DBAPIError:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ready"}
+
+# Prometheus scrape target
+@ops_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.post("/api/auth/register", status_code=201)
+async def register(user: UserSchema, db: AsyncSession = Depends(get_db), read_db: AsyncSession = Depends(get_read_db)):
+    db_user = await get_user_by_username(read_db, user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     new_user = models.User(username=user.username, hashed_password=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Someone claimed the name while we were hashing
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Username already registered")
     return {"message": "User created successfully"}
 
-@app.post("/api/auth/login")
-def login(user: LoginSchema, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+@router.post("/api/auth/login")
+async def login(user: LoginSchema, db: AsyncSession = Depends(get_read_db)):
+    db_user = await get_user_by_username(db, user.username)
+    if not db_user or not await verify_password(user.password, db_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -105,59 +328,239 @@ def login(user: LoginSchema, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 # Updated to use SweetCreate for input, SweetResponse for output
-@app.post("/api/sweets", response_model=SweetResponse, status_code=201)
-def create_sweet(sweet: SweetCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+@router.post("/api/sweets", response_model=SweetResponse, status_code=201)
+async def create_sweet(sweet: SweetCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     new_sweet = models.Sweet(name=sweet.name, category=sweet.category, price=sweet.price, quantity=sweet.quantity)
     db.add(new_sweet)
-    db.commit()
-    db.refresh(new_sweet)
+    await analytics.apply_category_deltas(db, analytics.stock_delta({}, sweet.category, sweet.price, sweet.quantity, 1))
+    await db.commit()
+    await catalog_changed(("created", sweet_event(new_sweet)))
     return new_sweet
 
-@app.get("/api/sweets", response_model=List[SweetResponse])
-def get_sweets(db: Session = Depends(get_db)):
-    return db.query(models.Sweet).all()
-
-@app.get("/api/sweets/search", response_model=List[SweetResponse])
-def search_sweets(name: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.Sweet)
-    if name:
-        query = query.filter(models.Sweet.name.contains(name))
-    return query.all()
-
-@app.post("/api/sweets/{sweet_id}/purchase")
-def purchase_sweet(sweet_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    sweet = db.query(models.Sweet).filter(models.Sweet.id == sweet_id).first()
-    if not sweet:
-        raise HTTPException(status_code=404, detail="Sweet not found")
-    if sweet.quantity <= 0:
+@router.get("/api/sweets", response_model=SweetPage)
+async def get_sweets(
+    request: Request,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Literal["id", "name", "price"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    db: AsyncSession = Depends(get_read_db),
+):
+    async def build():
+        stmt = select(models.Sweet)
+        if category:
+            stmt = stmt.where(models.Sweet.category == category)
+        if min_price is not None:
+            stmt = stmt.where(models.Sweet.price >= min_price)
+        if max_price is not None:
+            stmt = stmt.where(models.Sweet.price <= max_price)
+        return await paginate(db, stmt, sort, order, limit, cursor)
+    return await catalog_response(request, build)
+
+@router.get("/api/sweets/search", response_model=SweetPage)
+async def search_sweets(
+    request: Request,
+    name: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    async def build():
+        if not name or not FULL_TEXT_SEARCH:
+            # No search text (or no FTS5 in this database): plain filtered listing
+            stmt = select(models.Sweet)
+            if name:
+                stmt = stmt.where(models.Sweet.name.contains(name))
+            if category:
+                stmt = stmt.where(models.Sweet.category == category)
+            return await paginate(db, stmt, "id", "asc", limit, cursor)
+
+        after = decode_cursor(cursor, SCORE_TYPE) if cursor else None
+        # search.py is written against a sync Session; run_sync hands it one
+        # backed by this AsyncSession's connection.
+        rows = await db.run_sync(
+            lambda session: search.search_sweets(session, name, category=category, limit=limit + 1, after=after)
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].score, rows[-1].id)
+        return {"items": rows, "next_cursor": next_cursor}
+    return await catalog_response(request, build)
+
+@router.post("/api/sweets/import")
+async def import_sweets(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1, le=MAX_IMPORT_BATCH_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        format = next((name for name, media_type in bulk.FORMATS.items() if media_type == content_type), None)
+    if format is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+
+    parse = bulk.iter_csv if format == "csv" else bulk.iter_ndjson
+    try:
+        return await bulk.import_sweets(
+            db, parse(request.stream()), SweetCreate.model_validate, batch_size, MAX_IMPORT_ERRORS
+        )
+    except bulk.ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    finally:
+        # Batches commit as they go, so even a failed import may have written.
+        # Too many rows to push one by one: clients refetch instead.
+        await catalog_changed(("reset", {}))
+
+@router.get("/api/sweets/export")
+async def export_sweets(
+    format: Literal["csv", "ndjson"] = "ndjson",
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return StreamingResponse(
+        bulk.export_sweets(ReadSessionLocal, format, EXPORT_BATCH_SIZE),
+        media_type=bulk.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="sweets.{format}"'},
+    )
+
+# Server-Sent Events: created / updated / deleted / quantity_changed, plus
+# "reset" when the client should refetch. EventSource reconnects on its own
+# and sends Last-Event-ID; ?after= does the same for other clients. An id this
+# process did not issue gets "reset".
+@router.get("/api/sweets/events")
+async def sweet_events(request: Request, after: Optional[str] = None):
+    after = request.headers.get("last-event-id", after)
+    subscriber = inventory_events.subscribe(after)
+
+    async def stream():
+        try:
+            yield b"retry: 1000\n\n"
+            async for frame in subscriber.stream(EVENT_KEEPALIVE):
+                yield frame
+        finally:
+            inventory_events.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/api/sweets/{sweet_id}/purchase")
+async def purchase_sweet(sweet_id: int, quantity: int = Query(1, gt=0), db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    row = await take_stock(db, sweet_id, quantity)
+    if row is None:
+        await db.rollback()
+        if await db.get(models.Sweet, sweet_id) is None:
+            raise HTTPException(status_code=404, detail="Sweet not found")
         raise HTTPException(status_code=400, detail="Out of stock")
-    sweet.quantity -= 1
-    db.commit()
-    db.refresh(sweet)
-    return {"message": "Purchase successful", "remaining_quantity": sweet.quantity}
-
-@app.put("/api/sweets/{sweet_id}", response_model=SweetResponse)
-def update_sweet(sweet_id: int, sweet: SweetCreate, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    db_sweet = db.query(models.Sweet).filter(models.Sweet.id == sweet_id).first()
+    await analytics.record_purchases(db, [(sweet_id, quantity, row.price, row.category)])
+    await db.commit()
+    await catalog_changed(("quantity_changed", {"id": sweet_id, "quantity": row.quantity}))
+    return {"message": "Purchase successful", "remaining_quantity": row.quantity}
+
+@router.post("/api/orders", status_code=201)
+async def create_order(order: OrderCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    # Merge repeated lines, then lock rows in id order so concurrent orders
+    # on a row-locking database cannot deadlock each other.
+    wanted = {}
+    for item in order.items:
+        wanted[item.sweet_id] = wanted.get(item.sweet_id, 0) + item.quantity
+
+    remaining, purchases = {}, []
+    for sweet_id in sorted(wanted):
+        row = await take_stock(db, sweet_id, wanted[sweet_id])
+        if row is None:
+            await db.rollback()
+            if await db.get(models.Sweet, sweet_id) is None:
+                raise HTTPException(status_code=404, detail=f"Sweet {sweet_id} not found")
+            raise HTTPException(status_code=400, detail=f"Sweet {sweet_id} is out of stock")
+        remaining[sweet_id] = row.quantity
+        purchases.append((sweet_id, wanted[sweet_id], row.price, row.category))
+    await analytics.record_purchases(db, purchases)
+    await db.commit()
+    await catalog_changed(*(
+        ("quantity_changed", {"id": sweet_id, "quantity": left}) for sweet_id, left in remaining.items()
+    ))
+    return {
+        "message": "Order placed",
+        "items": [{"sweet_id": sweet_id, "remaining_quantity": left} for sweet_id, left in remaining.items()],
+    }
+
+@router.put("/api/sweets/{sweet_id}", response_model=SweetResponse)
+async def update_sweet(sweet_id: int, sweet: SweetCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    # Locked until commit: the stats deltas below are computed from this read,
+    # so a concurrent purchase must not change the row in between
+    db_sweet = await db.get(models.Sweet, sweet_id, with_for_update=True)
     if not db_sweet:
         raise HTTPException(status_code=404, detail="Sweet not found")
     
+    deltas = analytics.stock_delta({}, db_sweet.category, db_sweet.price, db_sweet.quantity, -1)
+    analytics.stock_delta(deltas, sweet.category, sweet.price, sweet.quantity, 1)
+    await analytics.apply_category_deltas(db, deltas)
     db_sweet.name = sweet.name
     db_sweet.category = sweet.category
     db_sweet.price = sweet.price
     db_sweet.quantity = sweet.quantity
     
-    db.commit()
-    db.refresh(db_sweet)
+    await db.commit()
+    await catalog_changed(("updated", sweet_event(db_sweet)))
     return db_sweet
 
-@app.delete("/api/sweets/{sweet_id}", status_code=204)
-def delete_sweet(sweet_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+@router.delete("/api/sweets/{sweet_id}", status_code=204)
+async def delete_sweet(sweet_id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     # Note: In a real app, you would check if current_user.is_admin here
-    db_sweet = db.query(models.Sweet).filter(models.Sweet.id == sweet_id).first()
+    db_sweet = await db.get(models.Sweet, sweet_id, with_for_update=True)
     if not db_sweet:
         raise HTTPException(status_code=404, detail="Sweet not found")
     
-    db.delete(db_sweet)
-    db.commit()
-    return None
\ No newline at end of file
+    await analytics.apply_category_deltas(
+        db, analytics.stock_delta({}, db_sweet.category, db_sweet.price, db_sweet.quantity, -1)
+    )
+    await db.delete(db_sweet)
+    await db.commit()
+    await catalog_changed(("deleted", {"id": sweet_id}))
+    return None
+
+# --- ANALYTICS ---
+# Served from the summary tables the write endpoints maintain
+
+@router.get("/api/analytics/inventory")
+async def inventory_analytics(db: AsyncSession = Depends(get_read_db), current_user: CurrentUser = Depends(get_current_user)):
+    return await analytics.inventory_summary(db)
+
+@router.get("/api/analytics/low-stock", response_model=List[SweetResponse])
+async def low_stock(
+    threshold: int = Query(5, ge=0),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await analytics.low_stock(db, threshold, limit)
+
+@router.get("/api/analytics/purchases")
+async def purchase_analytics(
+    window: Literal["1h", "24h", "7d", "30d"] = "24h",
+    sweet_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await analytics.purchase_stats(db, window, limit, sweet_id)
+
+# --- APP ---
+def create_app() -> FastAPI:
+    application = FastAPI(lifespan=lifespan)
+    if metrics.METRICS_ENABLED:
+        application.add_middleware(metrics.MetricsMiddleware)
+    application.include_router(ops_router)
+    application.include_router(router)
+    return application
+
+app = create_app()
\ No newline at end of file
@@ -0,0 +1,189 @@
+# backend/metrics.py
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+# --- METRICS ---
+# Request latency, per-request database work and timing spans around the
+# expensive helpers (bcrypt, JWT), exposed in Prometheus text format. Every
+# observation is a bisect plus a couple of additions under a lock, cheap
+# enough to leave on. SLOW_REQUEST_MS > 0 also logs any slower request along
+# with the SQL it ran; statements are only recorded while that is enabled.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+# Label values come from clients, so only these methods get their own series
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+logger = logging.getLogger("sweetshop.slow")
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            base = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{{{_join(base, _le(bound))}}} {cumulative}")
+            lines.append(f"{self.name}_bucket{{{_join(base, _le('+Inf'))}}} {values[-1]}")
+            lines.append(f"{self.name}_sum{{{base}}} {values[-2]}")
+            lines.append(f"{self.name}_count{{{base}}} {values[-1]}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _le(bound):
+    return f'le="{bound}"'
+
+
+def _join(*parts):
+    return ",".join(part for part in parts if part)
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Time until the response starts, by route", ("method", "route", "status")
+)
+request_db_queries = Histogram(
+    "http_request_db_queries", "SQL statements run per request", ("route",), QUERY_COUNT_BUCKETS
+)
+request_db_time = Histogram("http_request_db_seconds", "Time spent in SQL per request", ("route",))
+span_latency = Histogram("span_duration_seconds", "Time spent in instrumented helpers", ("span",))
+
+HISTOGRAMS = [request_latency, request_db_queries, request_db_time, span_latency]
+
+
+def render():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- PER-REQUEST STATS ---
+class RequestStats:
+    __slots__ = ("queries", "db_time", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = [] if SLOW_REQUEST_MS > 0 else None
+
+
+current_request = ContextVar("current_request", default=None)
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span_latency.observe(time.perf_counter() - start, name)
+
+
+def instrument_engine(sync_engine):
+    # Async engines run these hooks in SQLAlchemy's greenlet, which carries
+    # the request's context, so current_request still resolves.
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+            if stats.statements is not None:
+                stats.statements.append((elapsed, statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+
+class MetricsMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware: no extra task per request,
+    # and streaming responses pass straight through.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+        elapsed = None
+
+        async def send_wrapper(message):
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Streams (exports, event feeds) run long by design; the
+                # latency that matters is how soon they start
+                elapsed = time.perf_counter() - start
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            if elapsed is None:
+                elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", "unmatched")
+            # Requests that matched no route share one series whatever their method
+            method = scope["method"] if scope["method"] in HTTP_METHODS and route != "unmatched" else "other"
+            request_latency.observe(elapsed, method, route, str(status))
+            request_db_queries.observe(stats.queries, route)
+            request_db_time.observe(stats.db_time, route)
+            if stats.statements is not None and elapsed * 1000 >= SLOW_REQUEST_MS:
+                log_slow_request(scope, route, status, elapsed, stats)
+
+
+def log_slow_request(scope, route, status, elapsed, stats):
+    sql = "".join(f"\n  {seconds * 1000:8.2f} ms  {' '.join(statement.split())}" for seconds, statement in stats.statements)
+    logger.warning(
+        "Slow request %s %s (%s) -> %s in %.1f ms, %d queries, %.1f ms in SQL%s",
+        scope["method"], scope["path"], route, status, elapsed * 1000, stats.queries, stats.db_time * 1000, sql,
+    )
@@ -0,0 +1,137 @@
+# backend/migrations.py
+#
+# Versioned schema migrations. The database records the last applied version
+# in `schema_version`, so an up-to-date database costs one SELECT at startup
+# instead of reflecting every table. Each migration is a function that gets a
+# connection inside its own transaction. It must describe the schema as it was
+# at that point, never by importing the current models.
+#
+#   python migrations.py            # upgrade the DATABASE_URL database
+from sqlalchemy import Column, DateTime, Float, Index, Integer, MetaData, String, Table, text
+from sqlalchemy.exc import DBAPIError
+
+import search
+
+
+def _baseline(conn):
+    # users and sweets as they shipped before migrations existed. Existing
+    # databases already have them, so this only creates what is missing.
+    metadata = MetaData()
+    Table(
+        "users", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("username", String, unique=True, index=True),
+        Column("hashed_password", String),
+    )
+    Table(
+        "sweets", metadata,
+        Column("id", Integer, primary_key=True, index=True),
+        Column("name", String, index=True),
+        Column("category", String, index=True),
+        Column("price", Float),
+        Column("quantity", Integer),
+    )
+    metadata.create_all(conn)
+
+
+def _sweets_price_indexes(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sweets_price_id ON sweets (price, id)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sweets_category_price_id ON sweets (category, price, id)"))
+
+
+def _sweets_search_index(conn):
+    # No-op on databases without FTS5; search falls back to LIKE there
+    search.create_search_index(conn)
+
+
+def _sweets_name_category_index(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sweets_name_category ON sweets (name, category)"))
+
+
+def _analytics_tables(conn):
+    metadata = MetaData()
+    Table(
+        "category_stats", metadata,
+        Column("category", String, primary_key=True),
+        Column("sweets", Integer, nullable=False, default=0),
+        Column("units", Integer, nullable=False, default=0),
+        Column("stock_value", Float, nullable=False, default=0.0),
+    )
+    Table(
+        "purchase_events", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("sweet_id", Integer, nullable=False, index=True),
+        Column("quantity", Integer, nullable=False),
+        Column("unit_price", Float, nullable=False),
+        Column("purchased_at", DateTime, nullable=False, index=True),
+    )
+    Table(
+        "purchase_stats_hourly", metadata,
+        Column("sweet_id", Integer, primary_key=True),
+        Column("hour", DateTime, primary_key=True),
+        Column("purchases", Integer, nullable=False, default=0),
+        Column("units", Integer, nullable=False, default=0),
+        Column("revenue", Float, nullable=False, default=0.0),
+        Index("ix_purchase_stats_hourly_hour", "hour"),
+    )
+    metadata.create_all(conn)
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sweets_quantity_id ON sweets (quantity, id)"))
+    # Per-category totals for the stock already there; the write endpoints
+    # keep them current from here on. Earlier purchases were never recorded.
+    conn.execute(text("DELETE FROM category_stats"))
+    conn.execute(text(
+        "INSERT INTO category_stats (category, sweets, units, stock_value) "
+        "SELECT category, COUNT(*), COALESCE(SUM(quantity), 0), COALESCE(SUM(price * quantity), 0) "
+        "FROM sweets WHERE category IS NOT NULL GROUP BY category"
+    ))
+
+
+def _sweets_category_name_index(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sweets_category_name_id ON sweets (category, name, id)"))
+
+
+MIGRATIONS = [
+    (1, "baseline users and sweets tables", _baseline),
+    (2, "sweets price keyset indexes", _sweets_price_indexes),
+    (3, "sweets full-text search index", _sweets_search_index),
+    (4, "sweets (name, category) index for bulk upserts", _sweets_name_category_index),
+    (5, "inventory analytics summary tables and purchase log", _analytics_tables),
+    (6, "sweets (category, name) keyset index", _sweets_category_name_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(engine):
+    with engine.connect() as conn:
+        try:
+            return conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+        except DBAPIError:
+            return 0
+
+
+def upgrade(engine):
+    version = current_version(engine)
+    if version >= LATEST_VERSION:
+        return []
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    applied = []
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(text("INSERT INTO schema_version (version) VALUES (:version)"), {"version": number})
+        applied.append((number, description))
+    return applied
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    applied = upgrade(engine)
+    for number, description in applied:
+        print(f"applied {number}: {description}")
+    if not applied:
+        print(f"database is up to date (version {LATEST_VERSION})")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, DateTime, Integer, String, Float, Index
 from database import Base
 
 class User(Base):
@@ -13,4 +13,49 @@ class Sweet(Base):
     name = Column(String, index=True)
     category = Column(String, index=True) # <--- NEW
     price = Column(Float)
-    quantity = Column(Integer)
\ No newline at end of file
+    quantity = Column(Integer)
+
+    # Keyset pagination orders by (sort column, id). The single-column name and
+    # category indexes already carry the rowid on SQLite; these cover price
+    # sorting, and name or price sorting within a category.
+    __table_args__ = (
+        Index("ix_sweets_price_id", "price", "id"),
+        Index("ix_sweets_category_price_id", "category", "price", "id"),
+        Index("ix_sweets_category_name_id", "category", "name", "id"),
+        # Bulk import upserts on (name, category)
+        Index("ix_sweets_name_category", "name", "category"),
+        # Low-stock queries
+        Index("ix_sweets_quantity_id", "quantity", "id"),
+    )
+
+# --- ANALYTICS ---
+# Summary tables kept current by the write endpoints (see analytics.py), so
+# the dashboards never aggregate over sweets or the purchase log.
+class CategoryStats(Base):
+    __tablename__ = "category_stats"
+    category = Column(String, primary_key=True)
+    sweets = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    stock_value = Column(Float, nullable=False, default=0.0)
+
+# Every purchase, one row per sweet bought
+class PurchaseEvent(Base):
+    __tablename__ = "purchase_events"
+    id = Column(Integer, primary_key=True)
+    sweet_id = Column(Integer, nullable=False, index=True)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    purchased_at = Column(DateTime, nullable=False, index=True)
+
+# Purchases rolled up per sweet and hour, for the time-window queries
+class PurchaseStatsHourly(Base):
+    __tablename__ = "purchase_stats_hourly"
+    sweet_id = Column(Integer, primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+    purchases = Column(Integer, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index("ix_purchase_stats_hourly_hour", "hour"),
+    )
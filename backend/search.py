@@ -0,0 +1,142 @@
+# backend/search.py
+import difflib
+import re
+
+from sqlalchemy import text
+
+# SQLite FTS5 index over sweets(name, category). It is an external-content
+# table, so it stores only the inverted index and triggers keep it in sync with
+# every write to `sweets`, whether it comes from the ORM or raw SQL.
+FTS_TABLE = "sweets_fts"
+VOCAB_TABLE = "sweets_fts_vocab"
+
+# bm25 column weights: a hit in the name counts far more than in the category
+NAME_WEIGHT = 10.0
+CATEGORY_WEIGHT = 1.0
+
+# Typo tolerance: how close a vocabulary term must be to stand in for a query
+# term that matches nothing, and how many stand-ins to OR together.
+FUZZY_CUTOFF = 0.75
+FUZZY_MAX_TERMS = 3
+
+_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, category,
+        content='sweets', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')",
+    f"""CREATE TRIGGER IF NOT EXISTS sweets_fts_ai AFTER INSERT ON sweets BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, category) VALUES (new.id, new.name, new.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sweets_fts_ad AFTER DELETE ON sweets BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, category) VALUES ('delete', old.id, old.name, old.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sweets_fts_au AFTER UPDATE OF name, category ON sweets BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, category) VALUES ('delete', old.id, old.name, old.category);
+        INSERT INTO {FTS_TABLE}(rowid, name, category) VALUES (new.id, new.name, new.category);
+    END""",
+]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# Creates the index and its triggers if missing, inside the caller's
+# transaction. Returns False when the database cannot host it (not SQLite, or
+# SQLite built without FTS5); callers then fall back to LIKE matching.
+def create_search_index(conn) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    exists = search_index_exists(conn)
+    try:
+        for statement in _SCHEMA:
+            conn.execute(text(statement))
+    except Exception:
+        return False
+    if not exists:
+        # First boot against a populated table: index the existing rows.
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    return True
+
+
+def search_index_exists(conn) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    return conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first() is not None
+
+
+def tokenize(query: str):
+    return [token.lower() for token in _TOKEN_RE.findall(query)]
+
+
+def _has_prefix(db, term: str) -> bool:
+    return db.execute(
+        text(f"SELECT 1 FROM {VOCAB_TABLE} WHERE term >= :lo AND term < :hi LIMIT 1"),
+        {"lo": term, "hi": term + "\uffff"},
+    ).first() is not None
+
+
+def _close_terms(db, term: str):
+    # Only terms sharing the first character are candidates. This keeps the
+    # vocabulary scan to a small slice of the index.
+    first = term[0]
+    candidates = db.execute(
+        text(f"SELECT term FROM {VOCAB_TABLE} WHERE term >= :lo AND term < :hi"),
+        {"lo": first, "hi": chr(ord(first) + 1)},
+    ).scalars().all()
+    # Compare against prefixes of the same length so "chco" still finds "chocolate"
+    prefixes = {candidate[: len(term)] for candidate in candidates}
+    return difflib.get_close_matches(term, sorted(prefixes), n=FUZZY_MAX_TERMS, cutoff=FUZZY_CUTOFF)
+
+
+# Free text -> FTS5 MATCH expression. Every term is prefix-matched and all
+# terms must match; a term with no prefix hit in the index is swapped for the
+# closest vocabulary prefixes instead.
+def build_match_query(db, query: str) -> str:
+    clauses = []
+    for term in tokenize(query):
+        alternatives = [term]
+        if not _has_prefix(db, term):
+            alternatives = _close_terms(db, term) or [term]
+        clause = " OR ".join(f'"{alt}"*' for alt in alternatives)
+        clauses.append(f"({clause})" if len(alternatives) > 1 else clause)
+    return " AND ".join(clauses)
+
+
+# Ranked search, best match first. `after` is the (score, id) of the last row
+# already served; each row carries its score so callers can build a cursor.
+def search_sweets(db, query: str, category=None, limit: int = 50, after=None):
+    match = build_match_query(db, query)
+    if not match:
+        return []
+
+    params = {"match": match, "limit": limit}
+    filters = []
+    if category:
+        filters.append("s.category = :category")
+        params["category"] = category
+    if after is not None:
+        filters.append("(r.score, r.id) > (:after_score, :after_id)")
+        params["after_score"], params["after_id"] = after
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+
+    # Every match is scored, so the best rows are found however many there
+    # are. Scoring reads only the index; sweets is joined per candidate row
+    # and SQLite keeps just the top :limit of them while sorting.
+    sql = f"""
+        SELECT s.id, s.name, s.category, s.price, s.quantity, r.score
+        FROM (
+            SELECT rowid AS id, bm25({FTS_TABLE}, {NAME_WEIGHT}, {CATEGORY_WEIGHT}) AS score
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH :match
+        ) r
+        JOIN sweets s ON s.id = r.id
+        {where}
+        ORDER BY r.score, r.id
+        LIMIT :limit
+    """
+    return db.execute(text(sql), params).all()
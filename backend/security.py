@@ -0,0 +1,183 @@
+# backend/security.py
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+
+# --- PASSWORD HASHING ---
+# bcrypt is deliberately slow (~100-300 ms at cost 12). It runs in a small
+# process pool so a login burst burns those CPUs instead of the GIL shared by
+# every request. HASH_WORKERS=0 hashes inline, which is handy for tests.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes allowed in flight (running or queued) before new ones are refused
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", str(max(HASH_WORKERS, 1) * 4)))
+# How long a request waits for a free slot before giving up
+HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", "2.0"))
+
+
+# Built on first use: neither importing the app nor a worker that never
+# hashes pays for passlib and the bcrypt backend
+@functools.lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+# Module-level so worker processes can unpickle them without importing main
+def hash_password(password):
+    return get_pwd_context().hash(password)
+
+def check_password(plain_password, hashed_password):
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+class HashPoolBusy(Exception):
+    pass
+
+
+class HashPool:
+    def __init__(self, workers, queue_limit, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._free = queue_limit
+        self._waiters = deque()  # futures resolved when handed a slot, oldest first
+        self._slots_lock = threading.Lock()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created on first use; spawn keeps the workers free of the parent's
+        # threads, sockets and database connections.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def run(self, fn, *args):
+        await self._acquire()
+        try:
+            if self.workers <= 0:
+                return await asyncio.to_thread(fn, *args)
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            self._release()
+
+    async def _acquire(self):
+        # Slots are shared by every event loop in the process, so a waiter
+        # parks on a thread-safe future that the releasing request resolves:
+        # nothing wakes until a slot is actually free.
+        with self._slots_lock:
+            if self._free:
+                self._free -= 1
+                return
+            waiter = Future()
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(waiter), self.timeout)
+        except BaseException as exc:
+            with self._slots_lock:
+                # Fails only if a slot was handed over as the wait ended
+                granted = not waiter.cancel()
+                if not granted and waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if not isinstance(exc, asyncio.TimeoutError):
+                if granted:
+                    self._release()
+                raise
+            if not granted:
+                raise HashPoolBusy() from None
+
+    def _release(self):
+        with self._slots_lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if waiter.set_running_or_notify_cancel():
+                    waiter.set_result(None)
+                    return
+            self._free += 1
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+hash_pool = HashPool(HASH_WORKERS, HASH_QUEUE_LIMIT, HASH_QUEUE_TIMEOUT)
+
+
+# --- TOKEN CACHE ---
+# Verified token -> user identity, so authenticated requests skip jwt.decode
+# and the users SELECT. Entries live until the token expires or TOKEN_CACHE_TTL
+# passes, whichever is first; the least recently used go when the cache is full.
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    username: str
+
+
+class TokenCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # token -> (user, expires_at)
+        self._tokens_by_user = {}      # username -> {token, ...}
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def put(self, token, user, token_expires_at):
+        if self.maxsize <= 0:
+            return
+        expires_at = min(time.time() + self.ttl, token_expires_at)
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (user, expires_at)
+            self._tokens_by_user.setdefault(user.username, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, username):
+        with self._lock:
+            for token in self._tokens_by_user.pop(username, set()):
+                self._entries.pop(token, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_user.get(entry[0].username)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry[0].username]
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
@@ -0,0 +1,124 @@
+# backend/serve.py
+#
+# Pre-fork server. The parent imports the app and runs its startup
+# (migrations, search probe) once, binds the listening socket, then forks
+# workers that inherit both: every import and module-level object is shared
+# copy-on-write, so each worker starts serving at once and costs little
+# extra memory. Workers that die are replaced. POSIX only.
+#
+#   python serve.py --port 8000
+#   CATALOG_CACHE=redis://localhost:6379/0 python serve.py --workers 4 --port 8000
+#
+# Several workers need the catalog cache shared (redis) or off: the default
+# in-memory cache is per process, so a worker would keep serving pages that
+# another one has changed. The event feed and /metrics stay per worker.
+#
+# `uvicorn main:app --workers N` works too, but has every worker import the
+# app and run startup itself.
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+
+logger = logging.getLogger("sweetshop.serve")
+
+
+def bind_socket(host, port, backlog):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock, args):
+    import uvicorn
+
+    # The parent's handlers were copied; uvicorn installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_graceful_shutdown=args.graceful_timeout)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-fork server for the sweet shop API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="more than one needs CATALOG_CACHE=redis://... or off")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--graceful-timeout", type=int, default=10, help="seconds workers get to finish on shutdown")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(name)s %(message)s")
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import cache
+    import main as shop
+
+    if args.workers > 1:
+        if isinstance(cache.catalog_cache, cache.MemoryCache):
+            parser.error(
+                "--workers > 1 needs CATALOG_CACHE=redis://... or CATALOG_CACHE=off; "
+                "the in-memory cache is per process and would serve stale pages"
+            )
+        logger.warning(
+            "inventory events and /metrics are per worker: event streams only see their own worker's writes"
+        )
+
+    shop.initialize()
+    sock = bind_socket(args.host, args.port, args.backlog)
+    # Everything loaded so far is long-lived; freezing it keeps the workers'
+    # garbage collections from touching (and so un-sharing) those pages
+    gc.freeze()
+
+    workers = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(shop.app, sock, args)
+            except BaseException:
+                logger.exception("worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        workers.add(pid)
+        logger.info("started worker %d", pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+    logger.info("listening on %s:%d with %d workers", args.host, args.port, args.workers)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            logger.warning("worker %d exited (status %d), replacing it", pid, status)
+            spawn()
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+# backend/tests/conftest.py
+import os
+import shutil
+import tempfile
+
+# The app builds its engines from the environment when main is first
+# imported, which happens as the test modules are collected. Point it at a
+# throwaway database before that, so tests never write to sweets_v3.db.
+_db_dir = tempfile.mkdtemp(prefix="sweetshop-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+# Cheap hashes; the cost factor is not what these tests check
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_db_dir, ignore_errors=True)
@@ -0,0 +1,141 @@
+# backend/tests/test_analytics.py
+import asyncio
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from main import app
+from database import ReadSessionLocal, engine
+import analytics
+import random
+import string
+
+client = TestClient(app)
+
+def random_string(length=10):
+    return ''.join(random.choices(string.ascii_letters, k=length))
+
+def get_auth_token():
+    username = random_string()
+    password = "password123"
+    client.post("/api/auth/register", json={"username": username, "password": password})
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    return response.json()["access_token"]
+
+def create_sweet(headers, category, price, quantity):
+    return client.post(
+        "/api/sweets",
+        json={"name": random_string(), "category": category, "price": price, "quantity": quantity},
+        headers=headers
+    ).json()
+
+def category_summary(headers, category):
+    categories = client.get("/api/analytics/inventory", headers=headers).json()["categories"]
+    return next((c for c in categories if c["category"] == category), None)
+
+def test_category_stats_follow_every_write():
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    category, other = random_string(), random_string()
+    first = create_sweet(headers, category, 2.0, 10)
+    second = create_sweet(headers, category, 0.5, 4)
+    assert category_summary(headers, category) == {"category": category, "sweets": 2, "units": 14, "stock_value": 22.0}
+
+    client.post(f"/api/sweets/{first['id']}/purchase?quantity=3", headers=headers)
+    client.post("/api/orders", json={"items": [{"sweet_id": second["id"], "quantity": 2}]}, headers=headers)
+    assert category_summary(headers, category) == {"category": category, "sweets": 2, "units": 9, "stock_value": 15.0}
+
+    client.put(
+        f"/api/sweets/{second['id']}",
+        json={"name": second["name"], "category": other, "price": 1.0, "quantity": 5},
+        headers=headers
+    )
+    assert category_summary(headers, category)["sweets"] == 1
+    assert category_summary(headers, other) == {"category": other, "sweets": 1, "units": 5, "stock_value": 5.0}
+
+    client.delete(f"/api/sweets/{first['id']}", headers=headers)
+    assert category_summary(headers, category) is None
+
+def test_bulk_import_updates_category_stats():
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    category = random_string()
+    body = f"name,category,price,quantity\nA,{category},1.0,5\nB,{category},2.0,5\n"
+    client.post("/api/sweets/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    body = f"name,category,price,quantity\nA,{category},1.0,1\n"
+    client.post("/api/sweets/import", content=body.encode(), headers={**headers, "Content-Type": "text/csv"})
+    assert category_summary(headers, category) == {"category": category, "sweets": 2, "units": 6, "stock_value": 11.0}
+
+def test_purchases_per_sweet_in_window():
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    sweet = create_sweet(headers, random_string(), 1.5, 10)
+    client.post(f"/api/sweets/{sweet['id']}/purchase", headers=headers)
+    client.post(f"/api/sweets/{sweet['id']}/purchase?quantity=2", headers=headers)
+
+    stats = client.get(f"/api/analytics/purchases?window=1h&sweet_id={sweet['id']}", headers=headers).json()
+    assert stats["sweets"] == [
+        {"sweet_id": sweet["id"], "name": sweet["name"], "purchases": 2, "units": 3, "revenue": 4.5}
+    ]
+
+def test_order_lines_are_recorded_together():
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    category, other = random_string(), random_string()
+    a = create_sweet(headers, category, 1.0, 10)
+    b = create_sweet(headers, category, 2.0, 10)
+    c = create_sweet(headers, other, 3.0, 10)
+    items = [{"sweet_id": a["id"], "quantity": 1}, {"sweet_id": b["id"], "quantity": 2},
+             {"sweet_id": c["id"], "quantity": 3}, {"sweet_id": a["id"], "quantity": 1}]
+    assert client.post("/api/orders", json={"items": items}, headers=headers).status_code == 201
+
+    assert category_summary(headers, category) == {"category": category, "sweets": 2, "units": 16, "stock_value": 24.0}
+    assert category_summary(headers, other) == {"category": other, "sweets": 1, "units": 7, "stock_value": 21.0}
+    stats = client.get(f"/api/analytics/purchases?window=1h&sweet_id={a['id']}", headers=headers).json()
+    assert stats["sweets"] == [{"sweet_id": a["id"], "name": a["name"], "purchases": 1, "units": 2, "revenue": 2.0}]
+
+def test_purchase_window_covers_the_whole_period():
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    sweet = create_sweet(headers, random_string(), 1.0, 10)
+    client.post(f"/api/sweets/{sweet['id']}/purchase", headers=headers)
+    hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+
+    async def units(window, now):
+        async with ReadSessionLocal() as db:
+            stats = await analytics.purchase_stats(db, window, 10, sweet_id=sweet["id"], now=now)
+        return [s["units"] for s in stats["sweets"]]
+
+    # Just after the hour turns, the previous hour's sales are still in "1h"
+    assert asyncio.run(units("1h", hour + timedelta(hours=1, seconds=5))) == [1]
+    assert asyncio.run(units("1h", hour + timedelta(hours=2, seconds=5))) == []
+    assert asyncio.run(units("24h", hour + timedelta(hours=24, seconds=5))) == [1]
+
+def test_summary_rows_are_upserted_in_key_order():
+    executed = []
+
+    class RecordingSession:
+        async def execute(self, stmt, rows):
+            executed.append([row["category"] for row in rows])
+
+    deltas = {"b": (1, 1, 1.0), "c": (1, 1, 1.0), "a": (-1, -1, -1.0)}
+    asyncio.run(analytics.apply_category_deltas(RecordingSession(), deltas))
+    assert executed == [["a", "b", "c"]]
+
+def test_low_stock_threshold():
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    category = random_string()
+    low = create_sweet(headers, category, 1.0, 1)
+    create_sweet(headers, category, 1.0, 50)
+
+    items = client.get("/api/analytics/low-stock?threshold=1&limit=200", headers=headers).json()
+    assert low["id"] in [s["id"] for s in items]
+    assert all(s["quantity"] <= 1 for s in items)
+
+def test_summary_matches_a_full_recount():
+    # Whatever the other tests did, the incremental totals must equal a scan
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    with engine.connect() as conn:
+        expected = {
+            row.category: (row.sweets, row.units, round(row.value, 2))
+            for row in conn.execute(text(
+                "SELECT category, COUNT(*) AS sweets, SUM(quantity) AS units, SUM(price * quantity) AS value "
+                "FROM sweets GROUP BY category"
+            ))
+        }
+    categories = client.get("/api/analytics/inventory", headers=headers).json()["categories"]
+    assert {c["category"]: (c["sweets"], c["units"], c["stock_value"]) for c in categories} == expected
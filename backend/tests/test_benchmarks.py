@@ -0,0 +1,49 @@
+# backend/tests/test_benchmarks.py
+import json
+import os
+import subprocess
+import sys
+
+BENCH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "bench_api.py")
+sys.path.insert(0, os.path.dirname(BENCH))
+
+from bench_api import compare
+
+def report(p50_ms, throughput, operation="list", errors=0):
+    stats = {"requests": 100, "errors": errors, "throughput": throughput, "p50_ms": p50_ms, "p95_ms": 50.0, "p99_ms": 90.0}
+    return {"results": [{"sweets": 1000, "operations": {operation: stats}}]}
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = report(p50_ms=10.0, throughput=100.0)
+    assert compare(report(11.0, 95.0), baseline, tolerance=0.25) == []
+    regressions = compare(report(20.0, 50.0), baseline, tolerance=0.25)
+    assert len(regressions) == 2
+    assert "p50" in regressions[0] and "throughput" in regressions[1]
+
+def test_compare_flags_new_errors_even_when_faster():
+    baseline = report(p50_ms=10.0, throughput=100.0)
+    regressions = compare(report(5.0, 150.0, errors=3), baseline, tolerance=0.25)
+    assert regressions == ["list @ 1000 sweets: errors 0 -> 3"]
+    failed = report(None, 0.0, errors=100)
+    assert compare(failed, baseline, tolerance=0.25) == ["list @ 1000 sweets: errors 0 -> 100"]
+
+def test_compare_uses_per_operation_tolerance():
+    baseline = report(p50_ms=10.0, throughput=100.0, operation="login")
+    assert compare(report(14.0, 100.0, operation="login"), baseline, 0.25, {"login": 0.5}) == []
+    assert len(compare(report(14.0, 100.0, operation="login"), baseline, 0.25)) == 1
+
+def test_benchmark_smoke_run(tmp_path):
+    output = tmp_path / "run.json"
+    subprocess.run(
+        [sys.executable, BENCH, "--sweets", "200", "--users", "20", "--clients", "5", "--requests", "100",
+         "--repeat", "2", "--output", str(output)],
+        check=True, capture_output=True,
+    )
+    run = json.loads(output.read_text())
+    assert run["config"]["repeat"] == 2
+    result = run["results"][0]
+    assert result["sweets"] == 200
+    assert result["runs"] == 2
+    assert result["operations"]["all"]["requests"] == 100
+    assert result["operations"]["all"]["errors"] == 0
+    assert set(result["operations"]["list"]) >= {"throughput", "p50_ms", "p95_ms", "p99_ms"}
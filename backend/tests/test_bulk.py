@@ -0,0 +1,120 @@
+# backend/tests/test_bulk.py
+import json
+from fastapi.testclient import TestClient
+from main import app
+import random
+import string
+
+client = TestClient(app)
+
+def random_string(length=10):
+    return ''.join(random.choices(string.ascii_letters, k=length))
+
+def get_auth_token():
+    username = random_string()
+    password = "password123"
+    client.post("/api/auth/register", json={"username": username, "password": password})
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    return response.json()["access_token"]
+
+def test_import_ndjson_reports_bad_rows():
+    token = get_auth_token()
+    category = random_string()
+    lines = [
+        {"name": "Bonbon", "category": category, "price": 1.5, "quantity": 10},
+        {"name": "Praline", "category": category, "price": "free", "quantity": 1},
+        {"name": "Nougat", "category": category, "price": 2.0, "quantity": 3},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n{not json\n"
+
+    response = client.post(
+        "/api/sweets/import?batch_size=1",
+        content=body.encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    summary = response.json()
+    assert summary["inserted"] == 2
+    assert summary["failed"] == 2
+    assert [e["line"] for e in summary["errors"]] == [2, 4]
+
+def test_import_csv_upserts_on_name_and_category():
+    token = get_auth_token()
+    category = random_string()
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "text/csv"}
+    client.post(
+        "/api/sweets/import",
+        content=f"name,category,price,quantity\nFudge,{category},1.0,5\n".encode(),
+        headers=headers
+    )
+
+    # Streamed in small chunks; the quoted name spans two of them
+    def chunks():
+        data = f'name,category,price,quantity\nFudge,{category},1.25,50\n"Rocky, Road",{category},2.0,7\n'.encode()
+        for i in range(0, len(data), 7):
+            yield data[i:i + 7]
+
+    response = client.post("/api/sweets/import", content=chunks(), headers=headers)
+    assert response.json()["inserted"] == 1
+    assert response.json()["updated"] == 1
+
+    items = client.get(f"/api/sweets?category={category}&sort=name").json()["items"]
+    assert [(s["name"], s["price"], s["quantity"]) for s in items] == [("Fudge", 1.25, 50), ("Rocky, Road", 2.0, 7)]
+
+def test_import_csv_stray_quote_is_a_plain_character():
+    token = get_auth_token()
+    category = random_string()
+    body = f'name,category,price,quantity\n5" Lolly,{category},1.0,2\nBar,{category},2.0,3\n'
+    response = client.post(
+        "/api/sweets/import",
+        content=body.encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "text/csv"}
+    )
+    assert response.json()["inserted"] == 2
+    assert response.json()["failed"] == 0
+
+    items = client.get(f"/api/sweets?category={category}&sort=name").json()["items"]
+    assert [s["name"] for s in items] == ['5" Lolly', "Bar"]
+
+def test_import_skips_overlong_lines():
+    token = get_auth_token()
+    category = random_string()
+    huge = json.dumps({"name": "x" * 100_000, "category": category, "price": 1.0, "quantity": 1})
+    body = huge + "\n" + json.dumps({"name": "Toffee", "category": category, "price": 1.0, "quantity": 1}) + "\n"
+    response = client.post(
+        "/api/sweets/import",
+        content=body.encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+    )
+    summary = response.json()
+    assert summary["inserted"] == 1
+    assert [e["line"] for e in summary["errors"]] == [1]
+    assert "longer than" in summary["errors"][0]["error"]
+
+def test_import_requires_known_format():
+    token = get_auth_token()
+    response = client.post(
+        "/api/sweets/import",
+        content=b"<sweets/>",
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/xml"}
+    )
+    assert response.status_code == 415
+
+def test_export_streams_ndjson_and_csv():
+    token = get_auth_token()
+    category = random_string()
+    client.post(
+        "/api/sweets/import?format=ndjson",
+        content=json.dumps({"name": "Marzipan", "category": category, "price": 3.0, "quantity": 4}).encode(),
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+    response = client.get("/api/sweets/export", headers={"Authorization": f"Bearer {token}"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert any(r["name"] == "Marzipan" and r["category"] == category for r in rows)
+
+    response = client.get("/api/sweets/export?format=csv", headers={"Authorization": f"Bearer {token}"})
+    lines = response.text.splitlines()
+    assert lines[0] == "id,name,category,price,quantity"
+    assert any(line.endswith(f"Marzipan,{category},3.0,4") for line in lines)
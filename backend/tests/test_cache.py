@@ -0,0 +1,103 @@
+# backend/tests/test_cache.py
+import asyncio
+from fastapi.testclient import TestClient
+from main import app
+from cache import MemoryCache, etag_matches
+import random
+import string
+
+client = TestClient(app)
+
+def random_string(length=10):
+    return ''.join(random.choices(string.ascii_letters, k=length))
+
+def get_auth_token():
+    username = random_string()
+    password = "password123"
+    client.post("/api/auth/register", json={"username": username, "password": password})
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    return response.json()["access_token"]
+
+def test_memory_cache_evicts_by_size():
+    async def scenario():
+        cache = MemoryCache(max_bytes=10, ttl=60)
+        await cache.set(0, "a", '"a"', b"aaaa")
+        await cache.set(0, "b", '"b"', b"bbbb")
+        await cache.get(0, "a")
+        await cache.set(0, "c", '"c"', b"cccc")
+        return [await cache.get(0, key) for key in "abc"]
+    a, b, c = asyncio.run(scenario())
+    assert a == ('"a"', b"aaaa") and b is None and c is not None
+
+def test_memory_cache_invalidate_bumps_version():
+    async def scenario():
+        cache = MemoryCache(max_bytes=100, ttl=60)
+        version = await cache.version()
+        await cache.set(version, "a", '"a"', b"aaaa")
+        await cache.invalidate()
+        return version, await cache.version(), await cache.get(version, "a")
+    before, after, entry = asyncio.run(scenario())
+    assert after != before and entry is None
+
+def test_etag_matching():
+    assert etag_matches('"x"', '"y", W/"x"')
+    assert etag_matches('"x"', "*")
+    assert not etag_matches('"x"', '"y"')
+    assert not etag_matches('"x"', None)
+
+def test_unchanged_listing_returns_304():
+    category = random_string()
+    first = client.get(f"/api/sweets?category={category}")
+    etag = first.headers["etag"]
+
+    second = client.get(f"/api/sweets?category={category}", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+
+def test_writes_invalidate_cached_pages():
+    token = get_auth_token()
+    category = random_string()
+    url = f"/api/sweets?category={category}"
+    etag = client.get(url).headers["etag"]
+    assert client.get(url).json()["items"] == []
+
+    sweet = client.post(
+        "/api/sweets",
+        json={"name": "Toffee", "category": category, "price": 1.0, "quantity": 2},
+        headers={"Authorization": f"Bearer {token}"}
+    ).json()
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [s["quantity"] for s in response.json()["items"]] == [2]
+
+    client.post(f"/api/sweets/{sweet['id']}/purchase", headers={"Authorization": f"Bearer {token}"})
+    assert client.get(url).json()["items"][0]["quantity"] == 1
+    search = client.get(f"/api/sweets/search?name=Toffee&category={category}").json()["items"]
+    assert [s["quantity"] for s in search] == [1]
+
+def test_memory_cache_drops_pages_built_before_a_write():
+    async def scenario():
+        cache = MemoryCache(max_bytes=100, ttl=60)
+        stale = await cache.version()
+        await cache.invalidate()
+        await cache.set(stale, "a", '"a"', b"aaaa")
+        return cache._size, await cache.get(stale, "a")
+    size, entry = asyncio.run(scenario())
+    assert size == 0 and entry is None
+
+def test_cache_key_escapes_query_values():
+    token = get_auth_token()
+    category = random_string()
+    for name in ("A", "B", "C"):
+        client.post(
+            "/api/sweets",
+            json={"name": name, "category": category, "price": 1.0, "quantity": 1},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+    # One parameter whose value contains an encoded "&" and "=", then the
+    # two real parameters it spells out: they must not share a cache entry
+    crafted = client.get(f"/api/sweets?category={category}%26limit%3D2").json()
+    real = client.get(f"/api/sweets?category={category}&limit=2").json()
+    assert crafted["items"] == []
+    assert [s["name"] for s in real["items"]] == ["A", "B"]
@@ -0,0 +1,64 @@
+# backend/tests/test_metrics.py
+import logging
+from fastapi.testclient import TestClient
+from main import app
+import metrics
+import random
+import string
+
+client = TestClient(app)
+
+def random_string(length=10):
+    return ''.join(random.choices(string.ascii_letters, k=length))
+
+def get_auth_token():
+    username = random_string()
+    password = "password123"
+    client.post("/api/auth/register", json={"username": username, "password": password})
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    return response.json()["access_token"]
+
+def sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+
+def test_metrics_endpoint_reports_routes_queries_and_spans():
+    get_auth_token()
+    # A category nobody uses, so the catalog cache misses and SQL runs
+    client.get(f"/api/sweets?category={random_string()}")
+
+    text = client.get("/metrics").text
+    route = 'route="/api/sweets"'
+    assert sample(text, f'http_request_duration_seconds_count{{method="GET",{route},status="200"}}') >= 1
+    assert sample(text, f"http_request_db_queries_sum{{{route}}}") >= 1
+    assert sample(text, f"http_request_db_seconds_count{{{route}}}") >= 1
+    for span in ("get_password_hash", "verify_password", "jwt_encode"):
+        assert sample(text, f'span_duration_seconds_count{{span="{span}"}}') >= 1
+
+def test_slow_request_log_includes_sql(monkeypatch, caplog):
+    monkeypatch.setattr(metrics, "SLOW_REQUEST_MS", 0.001)
+    with caplog.at_level(logging.WARNING, logger="sweetshop.slow"):
+        client.get(f"/api/sweets?category={random_string()}")
+    messages = [record.getMessage() for record in caplog.records]
+    assert any("GET /api/sweets" in message and "SELECT" in message for message in messages)
+
+def test_client_chosen_methods_do_not_add_series():
+    for i in range(5):
+        client.request(f"X{i}", "/nope")
+        client.request(f"X{i}", "/api/sweets")
+    text = client.get("/metrics").text
+    assert 'method="X' not in text
+    assert 'http_request_duration_seconds_count{method="other",route="unmatched",status="404"}' in text
@@ -0,0 +1,93 @@
+# backend/tests/test_orders.py
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from main import app
+import random
+import string
+
+client = TestClient(app)
+
+def random_string(length=10):
+    return ''.join(random.choices(string.ascii_letters, k=length))
+
+def get_auth_token():
+    username = random_string()
+    password = "password123"
+    client.post("/api/auth/register", json={"username": username, "password": password})
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    return response.json()["access_token"]
+
+def create_sweet(token, quantity, category=None):
+    response = client.post(
+        "/api/sweets",
+        json={"name": "Jelly Bean", "category": category or random_string(), "price": 0.2, "quantity": quantity},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    return response.json()["id"]
+
+def test_order_multiple_sweets():
+    token = get_auth_token()
+    first = create_sweet(token, 10)
+    second = create_sweet(token, 5)
+
+    response = client.post(
+        "/api/orders",
+        json={"items": [
+            {"sweet_id": first, "quantity": 3},
+            {"sweet_id": second, "quantity": 5},
+            {"sweet_id": first, "quantity": 1},
+        ]},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 201
+    remaining = {item["sweet_id"]: item["remaining_quantity"] for item in response.json()["items"]}
+    assert remaining == {first: 6, second: 0}
+
+def test_order_is_all_or_nothing():
+    token = get_auth_token()
+    category = random_string()
+    plenty = create_sweet(token, 10, category)
+    scarce = create_sweet(token, 1, category)
+
+    response = client.post(
+        "/api/orders",
+        json={"items": [{"sweet_id": plenty, "quantity": 2}, {"sweet_id": scarce, "quantity": 2}]},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
+
+    # Nothing was taken from the sweet that did have enough stock
+    stock = {s["id"]: s["quantity"] for s in client.get(f"/api/sweets?category={category}").json()["items"]}
+    assert stock == {plenty: 10, scarce: 1}
+
+def test_order_unknown_sweet():
+    token = get_auth_token()
+    response = client.post(
+        "/api/orders",
+        json={"items": [{"sweet_id": 10**9, "quantity": 1}]},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
+
+def test_concurrent_purchases_never_oversell():
+    token = get_auth_token()
+    category = random_string()
+    stock = 20
+    sweet_id = create_sweet(token, stock, category)
+
+    # One portal for every thread, so all requests share one event loop as
+    # they would in a real worker
+    with TestClient(app) as shared_client:
+        def buy(_):
+            return shared_client.post(
+                f"/api/sweets/{sweet_id}/purchase",
+                headers={"Authorization": f"Bearer {token}"}
+            ).status_code
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            codes = list(pool.map(buy, range(stock * 4)))
+
+    assert codes.count(200) == stock
+    assert codes.count(400) == stock * 3
+    remaining = client.get(f"/api/sweets?category={category}").json()["items"][0]["quantity"]
+    assert remaining == 0
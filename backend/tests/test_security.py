@@ -0,0 +1,70 @@
+# backend/tests/test_security.py
+import asyncio
+import threading
+import time
+import pytest
+from security import CurrentUser, HashPool, HashPoolBusy, TokenCache, check_password, hash_password
+
+def test_token_cache_expires_with_token():
+    cache = TokenCache(maxsize=10, ttl=60)
+    cache.put("token", CurrentUser(id=1, username="alice"), time.time() - 1)
+    assert cache.get("token") is None
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenCache(maxsize=2, ttl=60)
+    expires = time.time() + 60
+    cache.put("a", CurrentUser(id=1, username="alice"), expires)
+    cache.put("b", CurrentUser(id=2, username="bob"), expires)
+    cache.get("a")
+    cache.put("c", CurrentUser(id=3, username="carol"), expires)
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+
+def test_token_cache_invalidate_user():
+    cache = TokenCache(maxsize=10, ttl=60)
+    expires = time.time() + 60
+    cache.put("a1", CurrentUser(id=1, username="alice"), expires)
+    cache.put("a2", CurrentUser(id=1, username="alice"), expires)
+    cache.put("b", CurrentUser(id=2, username="bob"), expires)
+    cache.invalidate_user("alice")
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b") is not None
+
+def test_hash_pool_round_trip():
+    pool = HashPool(workers=1, queue_limit=2, timeout=5)
+    try:
+        hashed = asyncio.run(pool.run(hash_password, "secret"))
+        assert asyncio.run(pool.run(check_password, "secret", hashed))
+        assert not asyncio.run(pool.run(check_password, "wrong", hashed))
+    finally:
+        pool.shutdown()
+
+def test_hash_pool_refuses_when_full():
+    pool = HashPool(workers=0, queue_limit=1, timeout=0.05)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        with pytest.raises(HashPoolBusy):
+            await pool.run(lambda: None)
+        release.set()
+        await busy
+
+    asyncio.run(scenario())
+
+def test_hash_pool_hands_slot_to_waiter():
+    pool = HashPool(workers=0, queue_limit=1, timeout=5)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.create_task(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        waiting = asyncio.create_task(pool.run(lambda: "done"))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        release.set()
+        await busy
+        assert await asyncio.wait_for(waiting, 1) == "done"
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+# backend/tests/test_startup.py
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import httpx
+from fastapi.testclient import TestClient
+from main import app
+import main
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous defaults so a slow CI box passes; tighten them where it is stable
+IMPORT_BUDGET_S = float(os.getenv("STARTUP_IMPORT_BUDGET_S", "5"))
+FIRST_REQUEST_BUDGET_S = float(os.getenv("STARTUP_FIRST_REQUEST_BUDGET_S", "5"))
+
+def test_cold_start_within_budget():
+    output = subprocess.run(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "bench_startup.py"), "--repeat", "1",
+         "--max-import-s", str(IMPORT_BUDGET_S), "--max-first-request-s", str(FIRST_REQUEST_BUDGET_S)],
+        capture_output=True, text=True,
+    )
+    assert output.returncode == 0, output.stderr
+    report = json.loads(output.stdout)
+    # Importing the app must stay free of database I/O and the bcrypt stack
+    assert report["db_touched_on_import"] is False
+    assert report["crypto_loaded_on_import"] is False
+
+def test_readiness(monkeypatch):
+    # Entering the client runs the lifespan, which performs startup
+    with TestClient(app) as started:
+        response = started.get("/ready")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
+
+        monkeypatch.setattr(main, "READY", False)
+        assert started.get("/ready").status_code == 503
+
+def test_prefork_server_serves_and_stops(tmp_path):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    # Several workers need a cache they share, or none
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'prefork.db'}", CATALOG_CACHE="off")
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "serve.py"), "--workers", "2", "--port", str(port),
+         "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/ready")
+                break
+            except httpx.TransportError:
+                assert time.monotonic() < deadline, "server did not come up"
+                time.sleep(0.1)
+        assert response.status_code == 200
+        assert httpx.get(f"http://127.0.0.1:{port}/api/sweets").json() == {"items": [], "next_cursor": None}
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=20) == 0
+
+def test_prefork_server_refuses_per_process_cache_with_workers(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'prefork.db'}", CATALOG_CACHE="memory")
+    result = subprocess.run(
+        [sys.executable, os.path.join(BACKEND_DIR, "serve.py"), "--workers", "2", "--port", "0"],
+        env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 2
+    assert "CATALOG_CACHE" in result.stderr
@@ -1,6 +1,10 @@
 # backend/tests/test_sweets.py
+import base64
+import json
 from fastapi.testclient import TestClient
+from sqlalchemy import text
 from main import app
+from database import engine
 import random
 import string
 
@@ -39,7 +43,70 @@ def test_create_sweet_authorized():
 def test_list_sweets():
     response = client.get("/api/sweets")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
+    assert isinstance(response.json()["items"], list)
+
+def test_list_sweets_keyset_pagination():
+    token = get_auth_token()
+    category = random_string()
+    for price in (3.0, 1.0, 2.0):
+        client.post(
+            "/api/sweets",
+            json={"name": "Toffee", "category": category, "price": price, "quantity": 5},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+    # Walk the category two at a time, cheapest first
+    first = client.get(f"/api/sweets?category={category}&sort=price&limit=2").json()
+    assert [s["price"] for s in first["items"]] == [1.0, 2.0]
+    assert first["next_cursor"]
+
+    second = client.get(f"/api/sweets?category={category}&sort=price&limit=2&cursor={first['next_cursor']}").json()
+    assert [s["price"] for s in second["items"]] == [3.0]
+    assert second["next_cursor"] is None
+
+def test_list_sweets_price_range():
+    token = get_auth_token()
+    category = random_string()
+    for price in (1.0, 5.0, 9.0):
+        client.post(
+            "/api/sweets",
+            json={"name": "Fudge", "category": category, "price": price, "quantity": 5},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+    response = client.get(f"/api/sweets?category={category}&min_price=2&max_price=9&sort=price&order=desc")
+    assert [s["price"] for s in response.json()["items"]] == [9.0, 5.0]
+
+def test_list_sweets_invalid_cursor():
+    response = client.get("/api/sweets?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+def test_tampered_cursor_is_rejected():
+    for payload in ([{"a": 1}, 2], [[1], 2], [True, 2]):
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+        assert client.get(f"/api/sweets?sort=price&cursor={cursor}").status_code == 400
+        assert client.get(f"/api/sweets/search?name=choc&cursor={cursor}").status_code == 400
+
+def test_cursor_sort_value_must_match_the_column():
+    def cursor(payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+    assert client.get(f"/api/sweets?sort=price&cursor={cursor(['abc', 2])}").status_code == 400
+    assert client.get(f"/api/sweets?sort=name&cursor={cursor([5, 2])}").status_code == 400
+    assert client.get(f"/api/sweets?sort=id&cursor={cursor([1.5, 2])}").status_code == 400
+    assert client.get(f"/api/sweets/search?name=choc&cursor={cursor(['abc', 2])}").status_code == 400
+    assert client.get(f"/api/sweets?sort=price&cursor={cursor([5, 2])}").status_code == 200
+    assert client.get(f"/api/sweets?sort=name&cursor={cursor(['m', 2])}").status_code == 200
+
+def test_category_listing_by_name_pages_from_an_index():
+    client.get("/api/sweets")  # runs migrations
+    with engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM sweets WHERE category = :c AND (name, id) > (:n, :i) "
+            "ORDER BY name, id LIMIT 51"
+        ), {"c": "Bar", "n": "M", "i": 1}))
+    assert "ix_sweets_category_name_id" in plan
+    assert "TEMP B-TREE" not in plan
 
 def test_search_sweets_by_name():
     token = get_auth_token()
@@ -52,10 +119,67 @@ def test_search_sweets_by_name():
     # Search for "Sour"
     response = client.get("/api/sweets/search?name=Sour")
     assert response.status_code == 200
-    data = response.json()
+    data = response.json()["items"]
     assert len(data) >= 1
     assert "Sour" in data[0]["name"]
 
+def test_search_sweets_prefix_and_typo():
+    token = get_auth_token()
+    word = random_string(8).lower()
+    client.post(
+        "/api/sweets",
+        json={"name": f"Dark {word}", "category": "Bar", "price": 3.0, "quantity": 5},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+    # Prefix of the word
+    response = client.get(f"/api/sweets/search?name={word[:5]}")
+    assert any(s["name"] == f"Dark {word}" for s in response.json()["items"])
+
+    # Same word with one character dropped
+    typo = word[:3] + word[4:]
+    response = client.get(f"/api/sweets/search?name={typo}")
+    assert any(s["name"] == f"Dark {word}" for s in response.json()["items"])
+
+def test_search_sweets_category_and_pagination():
+    token = get_auth_token()
+    category = random_string()
+    for _ in range(3):
+        client.post(
+            "/api/sweets",
+            json={"name": "Gummy Bear", "category": category, "price": 1.0, "quantity": 5},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+    first = client.get(f"/api/sweets/search?name=gummy&category={category}&limit=2").json()
+    assert len(first["items"]) == 2
+    second = client.get(f"/api/sweets/search?name=gummy&category={category}&limit=2&cursor={first['next_cursor']}").json()
+    assert len(second["items"]) == 1
+    assert second["next_cursor"] is None
+    ids = {s["id"] for s in first["items"] + second["items"]}
+    assert len(ids) == 3
+
+def test_search_ranks_every_match():
+    token = get_auth_token()
+    word = random_string(12).lower()
+    lines = [{"name": f"{word} bar {i}", "category": "Bar", "price": 1.0, "quantity": 1} for i in range(1500)]
+    lines.append({"name": word, "category": "Bar", "price": 1.0, "quantity": 1})
+    client.post(
+        "/api/sweets/import",
+        content="\n".join(json.dumps(line) for line in lines).encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+    )
+
+    # The exact name is inserted last but must rank first, and paging must
+    # reach every match rather than stopping early
+    page = client.get(f"/api/sweets/search?name={word}&limit=100").json()
+    assert page["items"][0]["name"] == word
+    ids = {s["id"] for s in page["items"]}
+    while page["next_cursor"]:
+        page = client.get(f"/api/sweets/search?name={word}&limit=100&cursor={page['next_cursor']}").json()
+        ids.update(s["id"] for s in page["items"])
+    assert len(ids) == 1501
+
 def test_purchase_sweet():
     token = get_auth_token()
     create_response = client.post(
@@ -72,8 +196,8 @@ def test_purchase_sweet():
     assert purchase_response.status_code == 200
     
     # Verify stock decreased
-    get_response = client.get("/api/sweets")
-    my_sweet = next(s for s in get_response.json() if s["id"] == sweet_id)
+    get_response = client.get("/api/sweets?order=desc&limit=1")
+    my_sweet = next(s for s in get_response.json()["items"] if s["id"] == sweet_id)
     assert my_sweet["quantity"] == 9
 
 def test_purchase_out_of_stock():
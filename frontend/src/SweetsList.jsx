@@ -1,10 +1,11 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 
 function SweetsList() {
   const [sweets, setSweets] = useState([]);
   const [search, setSearch] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
   // Updated state to include category
   const [newSweet, setNewSweet] = useState({ name: '', category: '', price: '', quantity: '' });
   const navigate = useNavigate();
@@ -15,16 +16,66 @@ function SweetsList() {
     fetchSweets();
   }, []);
 
+  // The event handlers outlive renders, so they read the latest view from refs
+  const searchRef = useRef(search);
+  const nextCursorRef = useRef(nextCursor);
+  searchRef.current = search;
+  nextCursorRef.current = nextCursor;
+
+  // Live inventory: apply pushed changes instead of refetching the list.
+  // EventSource reconnects by itself and resumes from the last event id.
+  useEffect(() => {
+    const events = new EventSource('/api/sweets/events');
+    const on = (type, apply) => events.addEventListener(type, e => apply(JSON.parse(e.data)));
+
+    on('created', sweet => {
+      // Only the unfiltered listing's last page is sure to include it
+      if (!searchRef.current && !nextCursorRef.current) {
+        setSweets(prev => prev.some(s => s.id === sweet.id) ? prev : [...prev, sweet]);
+      }
+    });
+    on('updated', sweet => setSweets(prev => prev.map(s => s.id === sweet.id ? sweet : s)));
+    on('deleted', ({ id }) => setSweets(prev => prev.filter(s => s.id !== id)));
+    on('quantity_changed', ({ id, quantity }) =>
+      setSweets(prev => prev.map(s => s.id === id ? { ...s, quantity } : s)));
+    on('reset', () => fetchSweets(searchRef.current));
+
+    return () => events.close();
+  }, []);
+
   const fetchSweets = async (searchTerm = '') => {
     const token = getToken();
     if (!token) return navigate('/login');
 
     try {
-      const endpoint = searchTerm ? `/api/sweets/search?name=${searchTerm}` : '/api/sweets';
-      const response = await axios.get(endpoint, {
+      const response = await axios.get(sweetsEndpoint(searchTerm), {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setSweets(response.data.items);
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      if (err.response && err.response.status === 401) navigate('/login');
+    }
+  };
+
+  // Listing and search both return { items, next_cursor } pages
+  const sweetsEndpoint = (searchTerm, cursor) => {
+    const params = new URLSearchParams();
+    if (searchTerm) params.set('name', searchTerm);
+    if (cursor) params.set('cursor', cursor);
+    const query = params.toString();
+    const path = searchTerm ? '/api/sweets/search' : '/api/sweets';
+    return query ? `${path}?${query}` : path;
+  };
+
+  const loadMore = async () => {
+    const token = getToken();
+    try {
+      const response = await axios.get(sweetsEndpoint(search, nextCursor), {
         headers: { Authorization: `Bearer ${token}` }
       });
-      setSweets(response.data);
+      setSweets(prev => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
     } catch (err) {
       if (err.response && err.response.status === 401) navigate('/login');
     }
@@ -39,7 +90,6 @@ function SweetsList() {
     const token = getToken();
     try {
       await axios.post(`/api/sweets/${id}/purchase`, {}, { headers: { Authorization: `Bearer ${token}` } });
-      fetchSweets(search);
       alert("Yum! Purchase successful.");
     } catch (err) {
       alert(err.response?.data?.detail || "Purchase failed");
@@ -52,7 +102,6 @@ function SweetsList() {
     const token = getToken();
     try {
       await axios.delete(`/api/sweets/${id}`, { headers: { Authorization: `Bearer ${token}` } });
-      fetchSweets(search);
     } catch (err) {
       alert("Failed to delete");
     }
@@ -65,7 +114,6 @@ function SweetsList() {
       await axios.post('/api/sweets', newSweet, { headers: { Authorization: `Bearer ${token}` } });
       // Clear form (including category)
       setNewSweet({ name: '', category: '', price: '', quantity: '' });
-      fetchSweets(search);
     } catch (err) {
       alert("Failed to add sweet. Make sure all fields including Category are filled.");
     }
@@ -132,6 +180,15 @@ function SweetsList() {
         ))}
       </div>
 
+      {nextCursor && (
+        <div style={{ display: 'flex', justifyContent: 'center', marginTop: '30px' }}>
+          <button onClick={loadMore}
+            style={{ background: '#007bff', color: 'white', border: 'none', padding: '10px 20px', borderRadius: '5px', cursor: 'pointer' }}>
+            Load More
+          </button>
+        </div>
+      )}
+
       {/* Restock Form */}
       <div style={{ marginTop: '60px', borderTop: '2px dashed #555', paddingTop: '30px', textAlign: 'center' }}>
         <h3 style={{ color: '#ccc', marginBottom: '20px' }}>Admin Restock</h3>